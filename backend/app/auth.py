@@ -19,9 +19,17 @@ def _normalize_password(password: str) -> bytes:
     return hashlib.sha256(raw).hexdigest().encode("utf-8")
 
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     normalized = _normalize_password(password)
-    return bcrypt.hashpw(normalized, bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(normalized, bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)).decode("utf-8")
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the hash was made with a different cost than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return True
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -32,17 +40,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(subject: str, token_version: int = 0, expires_delta: Optional[timedelta] = None) -> str:
     expire = datetime.now(timezone.utc) + (
         expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
     )
-    payload = {"sub": subject, "exp": expire}
+    payload = {"sub": subject, "ver": token_version, "exp": expire}
     return jwt.encode(payload, settings.secret_key, algorithm=settings.algorithm)
 
 
-def decode_token(token: str) -> Optional[str]:
+def decode_token_claims(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload.get("sub")
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
         return None
+
+
+def decode_token(token: str) -> Optional[str]:
+    claims = decode_token_claims(token)
+    return claims.get("sub") if claims else None
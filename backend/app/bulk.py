@@ -0,0 +1,24 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, model):
+    """
+    An INSERT that supports ON CONFLICT on both SQLite and PostgreSQL. Both
+    dialects expose the same on_conflict_do_update/do_nothing API.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def bulk_upsert(db: Session, model, rows: list[dict], conflict_columns: list[str], update_columns: list[str], where=None):
+    if not rows:
+        return
+    stmt = dialect_insert(db, model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={col: stmt.excluded[col] for col in update_columns},
+        where=where,
+    )
+    db.execute(stmt)
@@ -7,12 +7,73 @@ class Settings(BaseSettings):
     secret_key: str = "change-me-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 8
+    # bcrypt cost for new hashes; admins whose stored hash uses another cost are
+    # re-hashed on their next successful login.
+    bcrypt_rounds: int = Field(default=12, ge=4, le=31, validation_alias=AliasChoices("BCRYPT_ROUNDS", "bcrypt_rounds"))
+    # bcrypt runs in its own processes, never in the request threads.
+    password_hash_workers: int = Field(
+        default=2,
+        validation_alias=AliasChoices("PASSWORD_HASH_WORKERS", "password_hash_workers"),
+    )
+    password_hash_max_queue: int = Field(
+        default=16,
+        validation_alias=AliasChoices("PASSWORD_HASH_MAX_QUEUE", "password_hash_max_queue"),
+    )
+    # Token buckets in front of /auth/login: a burst size, refilled at a steady rate.
+    login_ip_burst: int = Field(default=10, validation_alias=AliasChoices("LOGIN_IP_BURST", "login_ip_burst"))
+    login_ip_per_minute: float = Field(
+        default=10,
+        validation_alias=AliasChoices("LOGIN_IP_PER_MINUTE", "login_ip_per_minute"),
+    )
+    login_email_burst: int = Field(default=5, validation_alias=AliasChoices("LOGIN_EMAIL_BURST", "login_email_burst"))
+    login_email_per_minute: float = Field(
+        default=5,
+        validation_alias=AliasChoices("LOGIN_EMAIL_PER_MINUTE", "login_email_per_minute"),
+    )
+    # Verified admin tokens are reused for this long without a JWT decode or
+    # an admins lookup. Deactivation and revocation take effect at once in the
+    # same process and within this window in other workers.
+    admin_cache_size: int = Field(default=1024, validation_alias=AliasChoices("ADMIN_CACHE_SIZE", "admin_cache_size"))
+    admin_cache_ttl_seconds: int = Field(
+        default=30,
+        validation_alias=AliasChoices("ADMIN_CACHE_TTL_SECONDS", "admin_cache_ttl_seconds"),
+    )
     invite_token_expire_hours: int = 6
+    # Largest CSV/JSON upload accepted by POST /admin/invite/bulk.
+    bulk_invite_max_rows: int = Field(
+        default=2000,
+        validation_alias=AliasChoices("BULK_INVITE_MAX_ROWS", "bulk_invite_max_rows"),
+    )
 
     database_url: str = Field(
         default="sqlite:///./machine_test.db",
         validation_alias=AliasChoices("DATABASE_URL", "database_url"),
     )
+    # Connection pool for the main database (both SQLite files and PostgreSQL).
+    db_pool_size: int = Field(default=10, validation_alias=AliasChoices("DB_POOL_SIZE", "db_pool_size"))
+    db_max_overflow: int = Field(default=20, validation_alias=AliasChoices("DB_MAX_OVERFLOW", "db_max_overflow"))
+    db_pool_timeout_seconds: int = Field(
+        default=30,
+        validation_alias=AliasChoices("DB_POOL_TIMEOUT_SECONDS", "db_pool_timeout_seconds"),
+    )
+    db_pool_recycle_seconds: int = Field(
+        default=1800,
+        validation_alias=AliasChoices("DB_POOL_RECYCLE_SECONDS", "db_pool_recycle_seconds"),
+    )
+    db_pool_pre_ping: bool = Field(default=True, validation_alias=AliasChoices("DB_POOL_PRE_PING", "db_pool_pre_ping"))
+    # SQLite only: how long a writer waits for the lock before "database is
+    # locked", and how much of the file is memory-mapped.
+    sqlite_busy_timeout_ms: int = Field(
+        default=5000,
+        validation_alias=AliasChoices("SQLITE_BUSY_TIMEOUT_MS", "sqlite_busy_timeout_ms"),
+    )
+    sqlite_mmap_mb: int = Field(default=256, validation_alias=AliasChoices("SQLITE_MMAP_MB", "sqlite_mmap_mb"))
+    # Rows per statement (and per commit) when a migration backfills or cleans up data.
+    migration_batch_size: int = Field(
+        default=5000,
+        ge=1,
+        validation_alias=AliasChoices("MIGRATION_BATCH_SIZE", "migration_batch_size"),
+    )
 
     smtp_host: str = Field(
         default="smtp.gmail.com",
@@ -45,6 +106,25 @@ class Settings(BaseSettings):
     )
     smtp_use_tls: bool = Field(default=True, validation_alias=AliasChoices("SMTP_USE_TLS", "smtp_use_tls"))
 
+    # Outgoing mail is queued in email_outbox and sent by a background
+    # dispatcher over one reused SMTP connection. Failed sends are retried
+    # with exponential backoff starting at email_retry_base_seconds.
+    email_batch_size: int = Field(default=50, validation_alias=AliasChoices("EMAIL_BATCH_SIZE", "email_batch_size"))
+    email_poll_seconds: float = Field(
+        default=5,
+        validation_alias=AliasChoices("EMAIL_POLL_SECONDS", "email_poll_seconds"),
+    )
+    email_max_attempts: int = Field(
+        default=6,
+        validation_alias=AliasChoices("EMAIL_MAX_ATTEMPTS", "email_max_attempts"),
+    )
+    email_retry_base_seconds: int = Field(
+        default=30,
+        validation_alias=AliasChoices("EMAIL_RETRY_BASE_SECONDS", "email_retry_base_seconds"),
+    )
+    # Close the SMTP connection after this long without mail; servers drop idle sessions anyway.
+    smtp_idle_seconds: int = Field(default=60, validation_alias=AliasChoices("SMTP_IDLE_SECONDS", "smtp_idle_seconds"))
+
     frontend_base_url: str = Field(
         default="http://localhost:5173",
         validation_alias=AliasChoices("FRONTEND_BASE_URL", "frontend_base_url"),
@@ -54,6 +134,93 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("DEFAULT_GEMINI_API_KEY", "default_gemini_api_key"),
     )
 
+    # Warm interpreter pool for /execute/python. Size 0 falls back to one
+    # fresh subprocess per run.
+    python_pool_size: int = Field(default=4, validation_alias=AliasChoices("PYTHON_POOL_SIZE", "python_pool_size"))
+    python_pool_max_runs: int = Field(
+        default=50,
+        validation_alias=AliasChoices("PYTHON_POOL_MAX_RUNS", "python_pool_max_runs"),
+    )
+
+    # Hard per-run sandbox limits; 0 disables a limit. Process count is
+    # RLIMIT_NPROC, which is counted per user, so any small value stops
+    # candidate code from forking.
+    python_cpu_seconds: int = Field(default=5, validation_alias=AliasChoices("PYTHON_CPU_SECONDS", "python_cpu_seconds"))
+    python_memory_mb: int = Field(default=512, validation_alias=AliasChoices("PYTHON_MEMORY_MB", "python_memory_mb"))
+    python_max_processes: int = Field(
+        default=1,
+        validation_alias=AliasChoices("PYTHON_MAX_PROCESSES", "python_max_processes"),
+    )
+    python_max_file_mb: int = Field(default=1, validation_alias=AliasChoices("PYTHON_MAX_FILE_MB", "python_max_file_mb"))
+    # stdout and stderr are each cut off at this many bytes and the run is stopped.
+    python_max_output_bytes: int = Field(
+        default=262144,
+        validation_alias=AliasChoices("PYTHON_MAX_OUTPUT_BYTES", "python_max_output_bytes"),
+    )
+
+    # Concurrent /execute runs, and how many more may wait before new runs get a 503.
+    execution_max_concurrency: int = Field(
+        default=8,
+        validation_alias=AliasChoices("EXECUTION_MAX_CONCURRENCY", "execution_max_concurrency"),
+    )
+    execution_max_queue: int = Field(
+        default=32,
+        validation_alias=AliasChoices("EXECUTION_MAX_QUEUE", "execution_max_queue"),
+    )
+
+    # Results of identical runs are reused for this long. Set a path to keep
+    # them in a SQLite file across restarts.
+    execution_cache_size: int = Field(
+        default=2048,
+        validation_alias=AliasChoices("EXECUTION_CACHE_SIZE", "execution_cache_size"),
+    )
+    execution_cache_ttl_seconds: int = Field(
+        default=3600,
+        validation_alias=AliasChoices("EXECUTION_CACHE_TTL_SECONDS", "execution_cache_ttl_seconds"),
+    )
+    execution_cache_path: str = Field(
+        default="",
+        validation_alias=AliasChoices("EXECUTION_CACHE_PATH", "execution_cache_path"),
+    )
+
+    # How often each worker checks whether cached candidate question payloads
+    # were invalidated by another worker.
+    question_cache_check_seconds: float = Field(
+        default=5,
+        validation_alias=AliasChoices("QUESTION_CACHE_CHECK_SECONDS", "question_cache_check_seconds"),
+    )
+
+    # On-disk SQLite files for SQL fixture packs, generated on first use.
+    sql_fixture_dir: str = Field(
+        default="./sql_fixtures",
+        validation_alias=AliasChoices("SQL_FIXTURE_DIR", "sql_fixture_dir"),
+    )
+    sql_max_result_rows: int = Field(
+        default=1000,
+        validation_alias=AliasChoices("SQL_MAX_RESULT_ROWS", "sql_max_result_rows"),
+    )
+
+    # Automatic grading of Python answers against hidden test cases.
+    grading_max_workers: int = Field(
+        default=4,
+        validation_alias=AliasChoices("GRADING_MAX_WORKERS", "grading_max_workers"),
+    )
+    grading_case_timeout_seconds: int = Field(
+        default=5,
+        validation_alias=AliasChoices("GRADING_CASE_TIMEOUT_SECONDS", "grading_case_timeout_seconds"),
+    )
+    regrade_chunk_size: int = Field(
+        default=200,
+        validation_alias=AliasChoices("REGRADE_CHUNK_SIZE", "regrade_chunk_size"),
+    )
+    # A running re-grade job touches its row every few seconds; one silent for
+    # this long (its process died) is marked failed so the question can be re-graded.
+    regrade_job_stale_seconds: int = Field(
+        default=120,
+        ge=10,
+        validation_alias=AliasChoices("REGRADE_JOB_STALE_SECONDS", "regrade_job_stale_seconds"),
+    )
+
     default_admins: str = Field(
         default="admin1@example.com:admin123,admin2@example.com:admin123",
         validation_alias=AliasChoices("DEFAULT_ADMINS", "default_admins"),
@@ -1,13 +1,121 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
 from .config import settings
 
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
-)
+def is_sqlite(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(database_url: str) -> bool:
+    database = make_url(database_url).database
+    return not database or database == ":memory:" or "mode=memory" in database
+
+
+def _configure_sqlite(engine):
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # WAL lets readers run alongside the single writer; with
+            # synchronous=NORMAL a commit no longer waits on an fsync of the
+            # main file. busy_timeout makes a writer wait for the lock instead
+            # of failing with "database is locked".
+            if not _is_memory_sqlite(str(engine.url)):
+                cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+            cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_mb) * 1024 * 1024}")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(database_url: str):
+    """
+    Engine for either dialect. SQLite gets its pragmas on every new
+    connection; everything else gets a sized, pre-pinged, recycled pool.
+    """
+    if is_sqlite(database_url):
+        if _is_memory_sqlite(database_url):
+            # Every connection to :memory: is a separate database; share one.
+            engine = create_engine(
+                database_url,
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+            )
+        else:
+            engine = create_engine(
+                database_url,
+                connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout_seconds,
+            )
+        _configure_sqlite(engine)
+        return engine
+
+    return create_engine(
+        database_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+
+
+# Drivers used by the async engine; the sync engine keeps the URL's own.
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in _ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+    return url.render_as_string(hide_password=False)
+
+
+def create_async_db_engine(database_url: str):
+    """
+    Async counterpart of create_db_engine() for the same database, with the
+    same pool limits and SQLite pragmas. An in-memory SQLite database cannot
+    be shared between the two engines, so the async one needs a real file.
+    """
+    url = async_database_url(database_url)
+    if is_sqlite(database_url):
+        if _is_memory_sqlite(database_url):
+            engine = create_async_engine(url, poolclass=StaticPool)
+        else:
+            engine = create_async_engine(
+                url,
+                connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout_seconds,
+            )
+        _configure_sqlite(engine.sync_engine)
+        return engine
+
+    return create_async_engine(
+        url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+
+
+engine = create_db_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_db_engine(settings.database_url)
+# Loaded attributes stay readable after commit: an expired attribute would
+# need a lazy load, which an AsyncSession cannot do implicitly.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
-
@@ -1,14 +1,28 @@
+import threading
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from .auth import decode_token
-from .database import SessionLocal
+from .auth import decode_token_claims
+from .config import settings
+from .database import AsyncSessionLocal, SessionLocal
 from .models import Admin
+from .result_cache import ResultCache, content_key
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Tokens that were verified recently, so the dashboard's burst of calls skips
+# the JWT decode and the admins lookup. Each entry records the admin's
+# invalidation epoch; invalidate_admin() bumps it, which retires every cached
+# token of that admin at once.
+_admin_cache = ResultCache(settings.admin_cache_size, settings.admin_cache_ttl_seconds)
+_admin_epochs: dict[str, int] = {}
+_epoch_lock = threading.Lock()
+
 
 def get_db():
     db = SessionLocal()
@@ -18,13 +32,60 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    # For async endpoints: the request's DB I/O awaits on the event loop
+    # instead of holding a threadpool worker.
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_admin_cache() -> ResultCache:
+    return _admin_cache
+
+
+def invalidate_admin(email: str):
+    with _epoch_lock:
+        _admin_epochs[email] = _admin_epochs.get(email, 0) + 1
+
+
+@event.listens_for(Admin, "after_update")
+@event.listens_for(Admin, "after_delete")
+def _forget_changed_admin(mapper, connection, target: Admin):
+    # Covers deactivation, password changes and revocation done through the ORM.
+    invalidate_admin(target.email)
+
+
 def get_current_admin(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Admin:
-    email = decode_token(token)
+    key = content_key(token)
+    cached = _admin_cache.get(key)
+    if (
+        cached is not None
+        and cached["epoch"] == _admin_epochs.get(cached["email"], 0)
+        and cached["exp"] > time.time()
+    ):
+        return Admin(id=cached["id"], email=cached["email"], is_active=True, token_version=cached["token_version"])
+
+    claims = decode_token_claims(token)
+    email = claims.get("sub") if claims else None
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    # Read before the lookup, so an invalidation that races with it wins.
+    epoch = _admin_epochs.get(email, 0)
     admin = db.query(Admin).filter(Admin.email == email, Admin.is_active.is_(True)).first()
     if not admin:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Admin not found")
-    return admin
+    if claims.get("ver", 0) != admin.token_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
 
+    _admin_cache.set(
+        key,
+        {
+            "id": admin.id,
+            "email": admin.email,
+            "token_version": admin.token_version,
+            "exp": claims.get("exp", 0),
+            "epoch": epoch,
+        },
+    )
+    return admin
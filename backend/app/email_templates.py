@@ -0,0 +1,194 @@
+import html
+import string
+import threading
+
+
+# Every email is described once, as data, and compiled into an HTML and a
+# plain-text body. Compiling folds the shared chrome and all fixed wording into
+# literal segments, so rendering is a single join over a short list with the
+# slot values dropped in. Values are HTML-escaped in the HTML body only.
+#
+# Any "{slot}" in a template string becomes a value passed to render_email().
+
+EMAIL_TEMPLATES = {
+    "invite": {
+        "subject": "Machine Test Invitation",
+        "title": "Machine Test Invitation",
+        "tagline": "You are invited to start your assessment.",
+        "accent": ("#0f172a", "#1d4ed8"),
+        "recipient": "{name}",
+        "intro": "You have been invited to take the Machine Test Platform assessment.",
+        "details": [
+            ("Test level", "{test_level}"),
+            ("Test duration", "{test_duration_minutes} minutes"),
+            ("Link expiry", "{expires_at}"),
+        ],
+        "action": ("Start Test", "{invite_link}"),
+        "notes": [
+            "Important: Use this unique link only once and keep stable internet during the test.",
+            "Fullscreen policy may be enforced. Best of luck.",
+        ],
+    },
+    "submission_received": {
+        "subject": "Submission Received - Machine Test",
+        "title": "Submission Received",
+        "tagline": "Your machine test has been submitted.",
+        "accent": ("#14532d", "#16a34a"),
+        "recipient": "{name}",
+        "intro": "Your machine test submission has been received successfully.",
+        "details": [
+            ("Submission type", "{reason}"),
+            ("Submitted at", "{submitted_at}"),
+        ],
+        "notes": [
+            "Our team will review your responses and get back to you.",
+            "Thank you for your time and effort.",
+        ],
+    },
+    "submission_reviewer": {
+        "subject": "Candidate Submitted Test - {name}",
+        "title": "Candidate Submitted",
+        "tagline": "A machine test is ready for review.",
+        "accent": ("#0f172a", "#334155"),
+        "recipient": "{reviewer_name}",
+        "intro": "Candidate {name} ({email}) has submitted the machine test.",
+        "details": [
+            ("Test level", "{test_level}"),
+            ("Submission type", "{reason}"),
+            ("Submitted at", "{submitted_at}"),
+        ],
+        "action": ("Open Admin Dashboard", "{dashboard_link}"),
+    },
+}
+
+_FONT = "font-family:Arial,sans-serif;"
+_BUTTON_STYLE = (
+    "display:inline-block;background:#2563eb;color:#ffffff;text-decoration:none;"
+    "padding:10px 16px;border-radius:8px;font-weight:600;"
+)
+
+_formatter = string.Formatter()
+
+
+def _parse(text: str) -> list:
+    """Splits "a {x} b" into ["a ", ("x",), " b"]."""
+    parts = []
+    for literal, field, _, _ in _formatter.parse(text):
+        if literal:
+            parts.append(literal)
+        if field is not None:
+            parts.append((field,))
+    return parts
+
+
+def _compile(parts: list) -> tuple:
+    """Merges adjacent literals; slots stay as 1-tuples holding the slot name."""
+    segments = []
+    for part in parts:
+        if isinstance(part, str) and segments and isinstance(segments[-1], str):
+            segments[-1] += part
+        else:
+            segments.append(part)
+    return tuple(segments)
+
+
+def _html_parts(spec: dict) -> list:
+    start, end = spec["accent"]
+    parts = [
+        f'<div style="{_FONT}background:#f4f7fb;padding:24px;color:#0f172a;">'
+        '<div style="max-width:620px;margin:0 auto;background:#ffffff;border:1px solid #e2e8f0;'
+        'border-radius:14px;overflow:hidden;">'
+        f'<div style="background:linear-gradient(135deg,{start},{end});padding:20px 24px;color:#ffffff;">'
+        f'<h2 style="margin:0;font-size:22px;">{html.escape(spec["title"])}</h2>'
+        f'<p style="margin:8px 0 0;opacity:0.9;">{html.escape(spec["tagline"])}</p>'
+        "</div>"
+        '<div style="padding:22px 24px;line-height:1.6;">'
+        '<p style="margin-top:0;">Hi <strong>',
+        *_parse(spec["recipient"]),
+        "</strong>,</p><p>",
+        *_parse(spec["intro"]),
+        "</p>",
+    ]
+    if spec.get("details"):
+        parts.append(
+            '<div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:10px;padding:14px 16px;">'
+        )
+        for label, value in spec["details"]:
+            parts += [f"<div><strong>{html.escape(label)}:</strong> ", *_parse(value), "</div>"]
+        parts.append("</div>")
+    if spec.get("action"):
+        label, link = spec["action"]
+        parts += [
+            '<p style="margin:18px 0;"><a href="',
+            *_parse(link),
+            f'" style="{_BUTTON_STYLE}">{html.escape(label)}</a></p>'
+            '<p style="word-break:break-all;margin:0 0 12px;"><strong>Direct link:</strong> <a href="',
+            *_parse(link),
+            '">',
+            *_parse(link),
+            "</a></p>",
+        ]
+    for note in spec.get("notes", []):
+        parts += ['<p style="margin:12px 0 0;font-size:13px;color:#475569;">', *_parse(note), "</p>"]
+    parts.append("</div></div></div>")
+    return parts
+
+
+def _text_parts(spec: dict) -> list:
+    parts = ["Hi ", *_parse(spec["recipient"]), ",\n\n", *_parse(spec["intro"]), "\n"]
+    if spec.get("details"):
+        parts.append("\n")
+        for label, value in spec["details"]:
+            parts += [f"{label}: ", *_parse(value), "\n"]
+    if spec.get("action"):
+        label, link = spec["action"]
+        parts += ["\n", f"{label}: ", *_parse(link), "\n"]
+    if spec.get("notes"):
+        parts.append("\n")
+        for note in spec["notes"]:
+            parts += [*_parse(note), "\n"]
+    return parts
+
+
+_compiled: dict[str, dict] | None = None
+_compile_lock = threading.Lock()
+
+
+def load_email_templates():
+    """Compiles every template once; called at startup, and lazily on first render."""
+    global _compiled
+    with _compile_lock:
+        if _compiled is None:
+            _compiled = {
+                name: {
+                    "subject": _compile(_parse(spec["subject"])),
+                    "body": _compile(_text_parts(spec)),
+                    "html_body": _compile(_html_parts(spec)),
+                }
+                for name, spec in EMAIL_TEMPLATES.items()
+            }
+
+
+def _html_value(value) -> str:
+    return html.escape(str(value), quote=True)
+
+
+def _header_value(value) -> str:
+    # A line break in a header value would make the message unsendable.
+    return " ".join(str(value).split())
+
+
+def _fill(segments: tuple, values: dict, convert=str) -> str:
+    return "".join(segment if isinstance(segment, str) else convert(values[segment[0]]) for segment in segments)
+
+
+def render_email(template_name: str, /, **values) -> dict:
+    """Returns subject, body and html_body for the named template, ready for queue_email()."""
+    if _compiled is None:
+        load_email_templates()
+    template = _compiled[template_name]
+    return {
+        "subject": _fill(template["subject"], values, _header_value),
+        "body": _fill(template["body"], values),
+        "html_body": _fill(template["html_body"], values, _html_value),
+    }
@@ -1,27 +1,217 @@
 import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
 from email.message import EmailMessage
 
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
 from .config import settings
+from .database import SessionLocal
+from .models import EmailOutbox
 
 
-def send_email(to_email: str, subject: str, body: str, html_body: str | None = None) -> bool:
-    if not settings.smtp_username or not settings.smtp_password:
-        print(f"[EMAIL MOCK] To: {to_email} | Subject: {subject}\n{body}")
-        if html_body:
-            print(f"[EMAIL MOCK HTML]\n{html_body}")
-        return False
+# Request handlers only add rows to email_outbox, in the same transaction as
+# the change the mail is about. A background dispatcher claims due rows in
+# batches and sends them over one long-lived SMTP connection. Several worker
+# processes may each run a dispatcher; a claim is a conditional UPDATE, so a
+# row is only picked up by one of them. A claim that is never finished (the
+# process died mid-batch) lapses after _CLAIM_SECONDS and the row is retried.
+
+_CLAIM_SECONDS = 600
+
+
+def queue_email(db: Session, to_email: str, subject: str, body: str, html_body: str | None = None):
+    """Adds a message to the outbox. The caller commits, then calls wake_email_dispatcher()."""
+    db.add(EmailOutbox(to_email=to_email, subject=subject, body=body, html_body=html_body))
 
+
+def queue_emails(db: Session, messages: list[dict]):
+    """Bulk form of queue_email: one INSERT for dicts with to_email, subject, body and html_body."""
+    if messages:
+        db.execute(insert(EmailOutbox), messages)
+
+
+def _build_message(row: EmailOutbox) -> EmailMessage:
     msg = EmailMessage()
-    msg["Subject"] = subject
+    msg["Subject"] = row.subject
     msg["From"] = settings.smtp_from_email
-    msg["To"] = to_email
-    msg.set_content(body)
-    if html_body:
-        msg.add_alternative(html_body, subtype="html")
-
-    with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-        if settings.smtp_use_tls:
-            server.starttls()
-        server.login(settings.smtp_username, settings.smtp_password)
-        server.send_message(msg)
-    return True
+    msg["To"] = row.to_email
+    msg.set_content(row.body)
+    if row.html_body:
+        msg.add_alternative(row.html_body, subtype="html")
+    return msg
+
+
+class _SMTPSession:
+    """One SMTP connection reused across messages; reopened when the server drops it."""
+
+    def __init__(self):
+        self._server: smtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=30)
+        try:
+            if settings.smtp_use_tls:
+                server.starttls()
+            server.login(settings.smtp_username, settings.smtp_password)
+        except BaseException:
+            server.close()
+            raise
+        self._server = server
+
+    def send(self, msg: EmailMessage):
+        self.close_if_idle()
+        if self._server is None:
+            self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._connect()
+            self._server.send_message(msg)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+            # The message was rejected; the connection itself is still fine.
+            self._last_used = time.monotonic()
+            raise
+        except BaseException:
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used > settings.smtp_idle_seconds:
+            self.close()
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+def _deliver(smtp: _SMTPSession, row: EmailOutbox):
+    if not settings.smtp_username or not settings.smtp_password:
+        print(f"[EMAIL MOCK] To: {row.to_email} | Subject: {row.subject}\n{row.body}")
+        if row.html_body:
+            print(f"[EMAIL MOCK HTML]\n{row.html_body}")
+        return
+    smtp.send(_build_message(row))
+
+
+def _claim_batch(db: Session) -> list[EmailOutbox]:
+    now = datetime.utcnow()
+    due = (
+        EmailOutbox.status.in_(("pending", "sending")),
+        EmailOutbox.next_attempt_at <= now,
+    )
+    ids = [
+        row.id
+        for row in db.query(EmailOutbox.id)
+        .filter(*due)
+        .order_by(EmailOutbox.id.asc())
+        .limit(settings.email_batch_size)
+        .all()
+    ]
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    db.query(EmailOutbox).filter(EmailOutbox.id.in_(ids), *due).update(
+        {
+            EmailOutbox.status: "sending",
+            EmailOutbox.claim_token: token,
+            EmailOutbox.next_attempt_at: now + timedelta(seconds=_CLAIM_SECONDS),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return db.query(EmailOutbox).filter(EmailOutbox.claim_token == token).order_by(EmailOutbox.id.asc()).all()
+
+
+def dispatch_pending(db: Session, smtp: _SMTPSession) -> int:
+    """Sends one batch of due messages. Returns how many were claimed."""
+    batch = _claim_batch(db)
+    for row in batch:
+        try:
+            _deliver(smtp, row)
+        except Exception as exc:  # noqa: BLE001 - any failure is retried later
+            row.attempts += 1
+            row.last_error = str(exc)[:2000]
+            row.claim_token = None
+            if row.attempts >= settings.email_max_attempts:
+                row.status = "failed"
+                print(f"[EMAIL] Giving up on message {row.id} to {row.to_email}: {exc}")
+            else:
+                row.status = "pending"
+                backoff = settings.email_retry_base_seconds * 2 ** (row.attempts - 1)
+                row.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff)
+            continue
+        row.status = "sent"
+        row.sent_at = datetime.utcnow()
+        row.claim_token = None
+        row.last_error = None
+    if batch:
+        db.commit()
+    return len(batch)
+
+
+def outbox_stats(db: Session) -> dict:
+    counts = dict(db.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all())
+    return {status: counts.get(status, 0) for status in ("pending", "sending", "sent", "failed")}
+
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+_thread_lock = threading.Lock()
+
+
+def wake_email_dispatcher():
+    _wake.set()
+
+
+def _dispatch_loop():
+    smtp = _SMTPSession()
+    try:
+        while not _stop.is_set():
+            # Cleared before looking, so a wake-up during a batch is not lost.
+            _wake.clear()
+            claimed = 0
+            db = SessionLocal()
+            try:
+                claimed = dispatch_pending(db, smtp)
+            except Exception as exc:  # noqa: BLE001 - keep the dispatcher alive
+                db.rollback()
+                print(f"[EMAIL] Dispatcher error: {exc}")
+            finally:
+                db.close()
+            if claimed < settings.email_batch_size:
+                smtp.close_if_idle()
+                _wake.wait(settings.email_poll_seconds)
+    finally:
+        smtp.close()
+
+
+def start_email_dispatcher():
+    global _thread
+    with _thread_lock:
+        if _thread is None:
+            _stop.clear()
+            _thread = threading.Thread(target=_dispatch_loop, name="email-dispatcher", daemon=True)
+            _thread.start()
+
+
+def stop_email_dispatcher():
+    global _thread
+    with _thread_lock:
+        if _thread is not None:
+            _stop.set()
+            _wake.set()
+            _thread.join(timeout=10)
+            _thread = None
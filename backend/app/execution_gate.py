@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+
+class ExecutionBusyError(Exception):
+    pass
+
+
+class ExecutionGate:
+    """
+    Caps how many code runs execute at once and how many may wait for a slot.
+    Anything beyond that is rejected immediately so execution load can never
+    tie up the threads that serve the rest of the API.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending = 0
+        # Blocking work (warm-pool round trips, sqlite) runs here rather than
+        # in Starlette's shared threadpool. Background grading submits its
+        # cases here directly, so they count against the same limit.
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="execution")
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._pending >= self.max_concurrency + self.max_queue:
+            raise ExecutionBusyError("Execution queue is full. Please retry shortly.")
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                yield
+        finally:
+            self._pending -= 1
+
+    async def run_blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_gate: ExecutionGate | None = None
+# Grading threads reach for the gate too, not only the event loop.
+_gate_lock = threading.Lock()
+
+
+def get_gate(max_concurrency: int, max_queue: int) -> ExecutionGate:
+    global _gate
+    with _gate_lock:
+        if _gate is None:
+            _gate = ExecutionGate(max_concurrency, max_queue)
+        return _gate
+
+
+def shutdown_gate():
+    global _gate
+    with _gate_lock:
+        if _gate is not None:
+            _gate.close()
+            _gate = None
@@ -0,0 +1,359 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy.orm import Session, joinedload
+
+from .config import settings
+from .database import SessionLocal
+from .execution_gate import get_gate
+from .bulk import bulk_upsert
+from .models import EvaluationMark, GradingResult, Question, RegradeJob, Submission, TestCase
+from .python_runner import run_python_code
+from .sql_runner import fingerprint_sql_query, normalize_sql_text
+
+
+# Printed before a function-call result so it can be told apart from whatever
+# the candidate's own code prints.
+RESULT_MARKER = "__GRADER_RESULT__"
+MAX_STORED_OUTPUT = 2000
+
+# Submissions are graded here, after submit and during batch re-grading; each
+# one then fans its cases out to the execution gate's executor, so grading and
+# interactive runs together never exceed EXECUTION_MAX_CONCURRENCY sandboxes.
+# Separate pools so the outer map can never starve the inner.
+_submission_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.grading_max_workers),
+    thread_name_prefix="regrade",
+)
+
+
+def _normalize_output(value: str) -> str:
+    lines = [line.rstrip() for line in (value or "").replace("\r\n", "\n").split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def _build_program(answer_text: str, case: TestCase) -> str:
+    if case.kind != "function":
+        return answer_text
+    return f"{answer_text}\n\nprint({RESULT_MARKER!r})\nprint(repr({case.call}))\n"
+
+
+def _extract_output(stdout: str, case: TestCase) -> str:
+    if case.kind != "function":
+        return stdout
+    _, marker, result = stdout.rpartition(f"{RESULT_MARKER}\n")
+    return result if marker else ""
+
+
+def _run_python_case(answer_text: str, case: TestCase) -> dict:
+    started = time.perf_counter()
+    try:
+        result = run_python_code(
+            _build_program(answer_text, case),
+            case.stdin or "",
+            timeout=settings.grading_case_timeout_seconds,
+        )
+    except (SyntaxError, ValueError) as exc:
+        # Rejected before it ran (syntax error or banned import/call).
+        return {"passed": False, "runtime_ms": None, "timed_out": False, "actual_output": "", "error": str(exc)}
+    runtime_ms = int((time.perf_counter() - started) * 1000)
+
+    actual = _extract_output(result["stdout"], case)
+    passed = (
+        not result["timed_out"]
+        and result["return_code"] == 0
+        and _normalize_output(actual) == _normalize_output(case.expected_output)
+    )
+    return {
+        "passed": passed,
+        "runtime_ms": runtime_ms,
+        "timed_out": result["timed_out"],
+        "actual_output": actual[:MAX_STORED_OUTPUT],
+        "error": (result["stderr"] or "")[:MAX_STORED_OUTPUT] or None,
+    }
+
+
+@lru_cache(maxsize=4096)
+def _cached_sql_fingerprint(normalized_query: str, dataset: str | None, ordered: bool, day: date) -> dict:
+    # `day` is part of the key because runtime_context changes with the date.
+    return fingerprint_sql_query(
+        normalized_query,
+        dataset,
+        ordered=ordered,
+        timeout=settings.grading_case_timeout_seconds,
+    )
+
+
+def _sql_fingerprint(normalized_query: str, dataset: str | None, ordered: bool, day: date) -> dict:
+    # lru_cache does not keep exceptions, so errors (a timeout under load in
+    # particular) are retried on the next grading instead of sticking.
+    try:
+        return _cached_sql_fingerprint(normalized_query, dataset, ordered, day)
+    except (ValueError, sqlite3.Error) as exc:
+        return {"error": str(exc)}
+
+
+def _run_sql_case(answer_text: str, case: TestCase, dataset: str | None) -> dict:
+    started = time.perf_counter()
+    day = date.today()
+    expected = _sql_fingerprint(normalize_sql_text(case.call or ""), dataset, bool(case.ordered), day)
+    actual = _sql_fingerprint(normalize_sql_text(answer_text), dataset, bool(case.ordered), day)
+    runtime_ms = int((time.perf_counter() - started) * 1000)
+
+    if "error" in expected:
+        error = f"Reference query failed: {expected['error']}"
+    else:
+        error = actual.get("error")
+    summary = "" if "error" in actual else f"{actual['row_count']} rows x {actual['column_count']} columns"
+    return {
+        "passed": error is None and actual == expected,
+        "runtime_ms": runtime_ms,
+        "timed_out": bool(error and "timed out" in error),
+        "actual_output": summary,
+        "error": error,
+    }
+
+
+def _run_case(answer_text: str, case: TestCase, dataset: str | None) -> dict:
+    if case.kind == "sql":
+        return _run_sql_case(answer_text, case, dataset)
+    return _run_python_case(answer_text, case)
+
+
+def run_cases(answer_text: str, cases: list[TestCase], dataset: str | None = None) -> list[dict]:
+    executor = get_gate(settings.execution_max_concurrency, settings.execution_max_queue).executor
+    return list(executor.map(lambda case: _run_case(answer_text, case, dataset), cases))
+
+
+def grade_submission(db: Session, submission: Submission) -> list[GradingResult]:
+    question = submission.question
+    case_kinds = {"sql"} if question.qtype == "sql" else {"stdio", "function"}
+    cases = [c for c in question.test_cases if c.kind in case_kinds]
+    if not cases:
+        return []
+
+    outcomes = run_cases(submission.answer_text, cases, question.dataset)
+    existing = {r.test_case_id: r for r in submission.grading_results}
+    results: list[GradingResult] = []
+    for case, outcome in zip(cases, outcomes):
+        row = existing.get(case.id)
+        if row is None:
+            row = GradingResult(submission_id=submission.id, test_case_id=case.id)
+            db.add(row)
+        for key, value in outcome.items():
+            setattr(row, key, value)
+        row.graded_at = datetime.utcnow()
+        results.append(row)
+    return results
+
+
+def grade_candidate(db: Session, candidate_id: int) -> int:
+    submissions = (
+        db.query(Submission)
+        .options(
+            joinedload(Submission.question).joinedload(Question.test_cases),
+            joinedload(Submission.grading_results),
+        )
+        .filter(Submission.candidate_id == candidate_id)
+        .all()
+    )
+    graded = 0
+    for submission in submissions:
+        if grade_submission(db, submission):
+            graded += 1
+    db.commit()
+    return graded
+
+
+def grade_candidate_in_background(candidate_id: int):
+    db = SessionLocal()
+    try:
+        grade_candidate(db, candidate_id)
+    except Exception as exc:  # noqa: BLE001 - grading must never break a submit
+        db.rollback()
+        print(f"[GRADING] Failed to grade candidate {candidate_id}: {exc}")
+    finally:
+        db.close()
+
+
+def queue_candidate_grading(candidate_id: int):
+    """Grades a submitted candidate on the grading pool, off the request threads."""
+    _submission_executor.submit(grade_candidate_in_background, candidate_id)
+
+
+def start_regrade_job(db: Session, question_id: int) -> RegradeJob:
+    job = RegradeJob(
+        question_id=question_id,
+        status="queued",
+        total=db.query(Submission.id).filter(Submission.question_id == question_id).count(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    threading.Thread(target=_run_regrade_job, args=(job.id,), daemon=True).start()
+    return job
+
+
+def _update_job(db: Session, job_id: int, **values):
+    db.query(RegradeJob).filter(RegradeJob.id == job_id).update(values, synchronize_session=False)
+    db.commit()
+
+
+def _heartbeat_interval() -> float:
+    return settings.regrade_job_stale_seconds / 4
+
+
+def _job_heartbeat(job_id: int, stop: threading.Event):
+    # Chunks can take a while; keep updated_at fresh in between so the job is
+    # never mistaken for an orphan while it is still working.
+    while not stop.wait(_heartbeat_interval()):
+        db = SessionLocal()
+        try:
+            _update_job(db, job_id, updated_at=datetime.utcnow())
+        except Exception as exc:  # noqa: BLE001 - the next beat tries again
+            db.rollback()
+            print(f"[GRADING] Heartbeat for re-grade job {job_id} failed: {exc}")
+        finally:
+            db.close()
+
+
+def fail_stale_regrade_jobs(db: Session) -> int:
+    """Marks queued/running jobs whose process stopped updating them as failed."""
+    now = datetime.utcnow()
+    count = (
+        db.query(RegradeJob)
+        .filter(
+            RegradeJob.status.in_(["queued", "running"]),
+            RegradeJob.updated_at < now - timedelta(seconds=settings.regrade_job_stale_seconds),
+        )
+        .update(
+            {
+                RegradeJob.status: "failed",
+                RegradeJob.error: "Job stopped responding (server restarted?)",
+                RegradeJob.finished_at: now,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return count
+
+
+def _write_chunk(db: Session, question_id: int, cases: list[TestCase], chunk: list, outcomes: list[list[dict]]):
+    now = datetime.utcnow()
+    result_rows = []
+    mark_rows = []
+    for (submission_id, candidate_id, _), case_outcomes in zip(chunk, outcomes):
+        score = 0
+        for case, outcome in zip(cases, case_outcomes):
+            result_rows.append({"submission_id": submission_id, "test_case_id": case.id, "graded_at": now, **outcome})
+            if outcome["passed"]:
+                score += case.points
+        mark_rows.append(
+            {
+                "candidate_id": candidate_id,
+                "question_id": question_id,
+                "marks": score,
+                "source": "auto",
+                "updated_at": now,
+            }
+        )
+
+    bulk_upsert(
+        db,
+        GradingResult,
+        result_rows,
+        conflict_columns=["submission_id", "test_case_id"],
+        update_columns=["passed", "runtime_ms", "timed_out", "actual_output", "error", "graded_at"],
+    )
+    # Never overwrite marks a reviewer entered by hand.
+    bulk_upsert(
+        db,
+        EvaluationMark,
+        mark_rows,
+        conflict_columns=["candidate_id", "question_id"],
+        update_columns=["marks", "updated_at"],
+        where=EvaluationMark.source == "auto",
+    )
+    db.commit()
+
+
+def _run_regrade_job(job_id: int):
+    db = SessionLocal()
+    stop_heartbeat = threading.Event()
+    threading.Thread(target=_job_heartbeat, args=(job_id, stop_heartbeat), daemon=True).start()
+    try:
+        job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+        question = (
+            db.query(Question).options(joinedload(Question.test_cases)).filter(Question.id == job.question_id).first()
+        )
+        case_kinds = {"sql"} if question.qtype == "sql" else {"stdio", "function"}
+        cases = [c for c in question.test_cases if c.kind in case_kinds]
+        # Detach plain copies so worker threads never touch the session.
+        db.expunge_all()
+        _update_job(db, job_id, status="running", started_at=datetime.utcnow())
+
+        processed = 0
+        failed = 0
+        last_id = 0
+        while cases:
+            # Keyset pagination keeps memory flat no matter how many submissions exist.
+            chunk = (
+                db.query(Submission.id, Submission.candidate_id, Submission.answer_text)
+                .filter(Submission.question_id == question.id, Submission.id > last_id)
+                .order_by(Submission.id.asc())
+                .limit(settings.regrade_chunk_size)
+                .all()
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+
+            outcomes = list(
+                _submission_executor.map(
+                    lambda row: run_cases(row.answer_text, cases, question.dataset),
+                    chunk,
+                )
+            )
+            _write_chunk(db, question.id, cases, chunk, outcomes)
+            processed += len(chunk)
+            failed += sum(1 for case_outcomes in outcomes if not all(o["passed"] for o in case_outcomes))
+            _update_job(db, job_id, processed=processed, failed=failed)
+
+        _update_job(db, job_id, status="completed", finished_at=datetime.utcnow())
+    except Exception as exc:  # noqa: BLE001 - surface the failure through the polling endpoint
+        db.rollback()
+        _update_job(db, job_id, status="failed", error=str(exc), finished_at=datetime.utcnow())
+    finally:
+        stop_heartbeat.set()
+        db.close()
+
+
+def regrade_job_progress(job: RegradeJob) -> dict:
+    throughput = None
+    eta_seconds = None
+    if job.started_at and job.processed:
+        elapsed = ((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds()
+        if elapsed > 0:
+            throughput = round(job.processed / elapsed, 2)
+            if job.status == "running":
+                eta_seconds = int(max(0, job.total - job.processed) / throughput)
+    return {
+        "job_id": job.id,
+        "question_id": job.question_id,
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "failed": job.failed,
+        "throughput_per_second": throughput,
+        "eta_seconds": eta_seconds,
+        "error": job.error,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
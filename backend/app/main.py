@@ -1,11 +1,23 @@
+import threading
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .database import Base, SessionLocal, engine
-from .migrations import run_sqlite_migrations
+from .database import SessionLocal, async_engine, engine
+from .email_templates import load_email_templates
+from .email_utils import start_email_dispatcher, stop_email_dispatcher
+from .execution_gate import shutdown_gate
+from .grading import fail_stale_regrade_jobs
+from .migrations import run_migrations
+from .password_pool import shutdown_password_pool
+from .python_pool import get_pool, shutdown_pool
+from .python_runner import sandbox_limits
+from .result_cache import shutdown_execution_cache
+from .revision import seed_revision
 from .routers import admin, auth, candidate, execution
-from .seed import seed_admins, seed_app_settings, seed_questions
+from .seed import seed_admins, seed_app_settings, seed_questions, seed_test_cases
+from .sql_datasets import warm_packs
 
 
 app = FastAPI(title=settings.app_name)
@@ -21,15 +33,38 @@ app.add_middleware(
 
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     db = SessionLocal()
     try:
-        run_sqlite_migrations(db, settings.database_url)
         seed_admins(db, settings.default_admins)
         seed_app_settings(db, settings.default_gemini_api_key)
+        seed_revision(db)
         seed_questions(db)
+        seed_test_cases(db)
+        fail_stale_regrade_jobs(db)
     finally:
         db.close()
+    if settings.python_pool_size > 0:
+        get_pool(settings.python_pool_size, settings.python_pool_max_runs, sandbox_limits())
+    # Generating a fixture pack the first time takes a few seconds; do it now
+    # rather than on a candidate's first SQL run.
+    threading.Thread(target=warm_packs, daemon=True).start()
+    load_email_templates()
+    start_email_dispatcher()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_email_dispatcher()
+    shutdown_password_pool()
+    shutdown_pool()
+    shutdown_gate()
+    shutdown_execution_cache()
+
+
+@app.on_event("shutdown")
+async def on_async_shutdown():
+    await async_engine.dispose()
 
 
 @app.get("/health")
@@ -1,71 +1,173 @@
-from sqlalchemy import text
+from sqlalchemy import Boolean, DateTime, Integer, Text, bindparam, func, inspect, literal, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
 
+from .config import settings
+from .database import Base
+from .models import SchemaMigration
 
-def _get_columns(db, table_name: str) -> set[str]:
-    rows = db.execute(text(f"PRAGMA table_info({table_name})")).fetchall()
-    return {row[1] for row in rows}
 
+# Schema changes are numbered and recorded in schema_migrations. At startup a
+# current database costs one MAX(version) lookup; otherwise create_all() adds
+# any missing tables and each pending migration runs once, in order, on any
+# dialect. Migrations check before they change anything, since databases
+# created before this runner (or by create_all) may already have part of the
+# change. Data fixes run in batches of MIGRATION_BATCH_SIZE rows, each in its
+# own commit, so no single statement holds a large table for long.
+#
+# To change the schema, update the model and append a migration; a new table
+# needs one too (it may do nothing), so that startup notices it.
 
-def run_sqlite_migrations(db, database_url: str):
-    if not database_url.startswith("sqlite"):
+_PG_LOCK_KEY = 72_016_025
+
+
+def _columns(db: Session, table: str) -> set[str]:
+    return {col["name"] for col in inspect(db.connection()).get_columns(table)}
+
+
+def _add_column(db: Session, table: str, column: str, type_, default=None, nullable: bool = True):
+    if column in _columns(db, table):
         return
+    dialect = db.get_bind().dialect
+    ddl = f"ALTER TABLE {table} ADD COLUMN {column} {type_.compile(dialect=dialect)}"
+    if default is not None:
+        value = literal(default, type_).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        ddl += f" DEFAULT {value}"
+    if not nullable:
+        ddl += " NOT NULL"
+    db.execute(text(ddl))
 
-    candidate_cols = _get_columns(db, "candidates")
-    if "test_level" not in candidate_cols:
-        db.execute(text("ALTER TABLE candidates ADD COLUMN test_level TEXT DEFAULT 'intermediate'"))
-    if "interview_marks" not in candidate_cols:
-        db.execute(text("ALTER TABLE candidates ADD COLUMN interview_marks INTEGER"))
-    if "interviewer_name" not in candidate_cols:
-        db.execute(text("ALTER TABLE candidates ADD COLUMN interviewer_name TEXT"))
-    if "reviewer_emails" not in candidate_cols:
-        db.execute(text("ALTER TABLE candidates ADD COLUMN reviewer_emails TEXT"))
-    if "test_duration_minutes" not in candidate_cols:
-        db.execute(text("ALTER TABLE candidates ADD COLUMN test_duration_minutes INTEGER DEFAULT 60"))
-    if "test_started_at" not in candidate_cols:
-        db.execute(text("ALTER TABLE candidates ADD COLUMN test_started_at DATETIME"))
-    if "submission_reason" not in candidate_cols:
-        db.execute(text("ALTER TABLE candidates ADD COLUMN submission_reason TEXT"))
-    if "submitted_at" not in candidate_cols:
-        db.execute(text("ALTER TABLE candidates ADD COLUMN submitted_at DATETIME"))
-    db.execute(text("UPDATE candidates SET test_level = 'intermediate' WHERE test_level IS NULL"))
-    db.execute(text("UPDATE candidates SET test_duration_minutes = 60 WHERE test_duration_minutes IS NULL"))
-
-    question_cols = _get_columns(db, "questions")
-    if "level" not in question_cols:
-        db.execute(text("ALTER TABLE questions ADD COLUMN level TEXT DEFAULT 'intermediate'"))
-    db.execute(text("UPDATE questions SET level = 'intermediate' WHERE level IS NULL"))
 
-    db.execute(
-        text(
-            """
-            CREATE TABLE IF NOT EXISTS app_settings (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_at DATETIME
-            )
-            """
-        )
+def _backfill(db: Session, table: str, column: str, value):
+    """Replaces NULLs in table.column with value, one batch per commit."""
+    stmt = text(
+        f"UPDATE {table} SET {column} = :value "
+        f"WHERE id IN (SELECT id FROM {table} WHERE {column} IS NULL LIMIT :batch)"
     )
+    while db.execute(stmt, {"value": value, "batch": settings.migration_batch_size}).rowcount:
+        db.commit()
 
-    db.execute(
-        text(
-            """
-            CREATE TABLE IF NOT EXISTS evaluation_marks (
-                id INTEGER PRIMARY KEY,
-                candidate_id INTEGER NOT NULL,
-                question_id INTEGER NOT NULL,
-                marks INTEGER NOT NULL,
-                updated_at DATETIME,
-                FOREIGN KEY(candidate_id) REFERENCES candidates(id),
-                FOREIGN KEY(question_id) REFERENCES questions(id)
-            )
-            """
+
+def _has_index(db: Session, table: str, name: str) -> bool:
+    return any(index["name"] == name for index in inspect(db.connection()).get_indexes(table))
+
+
+def _has_unique(db: Session, table: str, columns: list[str]) -> bool:
+    inspector = inspect(db.connection())
+    return any(c["column_names"] == columns for c in inspector.get_unique_constraints(table)) or any(
+        index["unique"] and index["column_names"] == columns for index in inspector.get_indexes(table)
+    )
+
+
+def _candidate_columns(db: Session):
+    _add_column(db, "candidates", "test_level", Text(), default="intermediate")
+    _add_column(db, "candidates", "interview_marks", Integer())
+    _add_column(db, "candidates", "interviewer_name", Text())
+    _add_column(db, "candidates", "reviewer_emails", Text())
+    _add_column(db, "candidates", "test_duration_minutes", Integer(), default=60)
+    _add_column(db, "candidates", "test_started_at", DateTime())
+    _add_column(db, "candidates", "submission_reason", Text())
+    _add_column(db, "candidates", "submitted_at", DateTime())
+    _backfill(db, "candidates", "test_level", "intermediate")
+    _backfill(db, "candidates", "test_duration_minutes", 60)
+
+
+def _question_level_and_dataset(db: Session):
+    _add_column(db, "questions", "level", Text(), default="intermediate")
+    _add_column(db, "questions", "dataset", Text())
+    _backfill(db, "questions", "level", "intermediate")
+
+
+def _test_case_ordered(db: Session):
+    _add_column(db, "test_cases", "ordered", Boolean(), default=False)
+
+
+def _evaluation_mark_source(db: Session):
+    # app_settings and evaluation_marks themselves come from create_all().
+    _add_column(db, "evaluation_marks", "source", Text(), default="manual")
+    if not _has_unique(db, "evaluation_marks", ["candidate_id", "question_id"]):
+        db.execute(
+            text("CREATE UNIQUE INDEX uq_candidate_question_mark ON evaluation_marks (candidate_id, question_id)")
         )
+
+
+def _candidate_list_index(db: Session):
+    if not _has_index(db, "candidates", "ix_candidates_created_at_id"):
+        db.execute(text("CREATE INDEX ix_candidates_created_at_id ON candidates (created_at, id)"))
+
+
+def _unique_submissions(db: Session):
+    _add_column(db, "submissions", "answer_hash", Text())
+    if _has_unique(db, "submissions", ["candidate_id", "question_id"]):
+        return
+    # Keep only the newest row per (candidate, question) before enforcing uniqueness.
+    duplicates = text(
+        "SELECT id FROM submissions WHERE id NOT IN "
+        "(SELECT MAX(id) FROM submissions GROUP BY candidate_id, question_id) LIMIT :batch"
+    )
+    delete_results = text("DELETE FROM grading_results WHERE submission_id IN :ids").bindparams(
+        bindparam("ids", expanding=True)
     )
+    delete_submissions = text("DELETE FROM submissions WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+    while ids := db.execute(duplicates, {"batch": settings.migration_batch_size}).scalars().all():
+        db.execute(delete_results, {"ids": ids})
+        db.execute(delete_submissions, {"ids": ids})
+        db.commit()
     db.execute(
-        text(
-            "CREATE UNIQUE INDEX IF NOT EXISTS uq_candidate_question_mark ON evaluation_marks(candidate_id, question_id)"
-        )
+        text("CREATE UNIQUE INDEX uq_submission_candidate_question ON submissions (candidate_id, question_id)")
     )
 
-    db.commit()
+
+def _admin_token_version(db: Session):
+    _add_column(db, "admins", "token_version", Integer(), default=0, nullable=False)
+
+
+MIGRATIONS = [
+    (1, "candidate_columns", _candidate_columns),
+    (2, "question_level_and_dataset", _question_level_and_dataset),
+    (3, "test_case_ordered", _test_case_ordered),
+    (4, "evaluation_mark_source", _evaluation_mark_source),
+    (5, "candidate_list_index", _candidate_list_index),
+    (6, "unique_submissions", _unique_submissions),
+    (7, "admin_token_version", _admin_token_version),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(db: Session) -> int:
+    """The highest applied migration; 0 when schema_migrations does not exist yet."""
+    try:
+        return db.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+    except DBAPIError:
+        db.rollback()
+        return 0
+
+
+def run_migrations(engine):
+    # Everything runs on one connection, which on PostgreSQL also holds an
+    # advisory lock so that only one worker process migrates at a time.
+    with engine.connect() as connection, Session(bind=connection) as db:
+        if schema_version(db) >= LATEST_VERSION:
+            return
+        db.commit()
+        postgres = engine.dialect.name == "postgresql"
+        if postgres:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+            connection.commit()
+        try:
+            Base.metadata.create_all(bind=connection)
+            connection.commit()
+            # Read again: another worker may have migrated while we waited.
+            version = schema_version(db)
+            for number, name, migrate in MIGRATIONS:
+                if number <= version:
+                    continue
+                migrate(db)
+                db.add(SchemaMigration(version=number, name=name))
+                db.commit()
+                print(f"[MIGRATIONS] Applied {number:03d} {name}")
+        finally:
+            if postgres:
+                db.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+                connection.commit()
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -13,11 +13,15 @@ class Admin(Base):
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
+    # Carried in every access token as "ver"; bumping it revokes all tokens issued so far.
+    token_version = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class Candidate(Base):
     __tablename__ = "candidates"
+    # Keyset pagination of the admin list walks this index.
+    __table_args__ = (Index("ix_candidates_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -52,22 +56,27 @@ class Question(Base):
     qtype = Column(String(20), nullable=False)  # python | sql
     title = Column(String(255), nullable=False)
     prompt = Column(Text, nullable=False)
+    dataset = Column(String(50), nullable=True)  # SQL fixture pack; None means the default employees table
 
     submissions = relationship("Submission", back_populates="question")
+    test_cases = relationship("TestCase", back_populates="question", order_by="TestCase.order_no")
 
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (UniqueConstraint("candidate_id", "question_id", name="uq_submission_candidate_question"),)
 
     id = Column(Integer, primary_key=True, index=True)
     candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     answer_text = Column(Text, nullable=False)
+    answer_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     candidate = relationship("Candidate", back_populates="submissions")
     question = relationship("Question", back_populates="submissions")
+    grading_results = relationship("GradingResult", back_populates="submission", cascade="all, delete-orphan")
 
 
 class AppSetting(Base):
@@ -86,7 +95,87 @@ class EvaluationMark(Base):
     candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False, index=True)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
     marks = Column(Integer, nullable=False)
+    source = Column(String(20), nullable=False, default="manual")  # manual | auto (written by re-grading)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     candidate = relationship("Candidate", back_populates="evaluation_marks")
     question = relationship("Question")
+
+
+class TestCase(Base):
+    __tablename__ = "test_cases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
+    order_no = Column(Integer, nullable=False)
+    kind = Column(String(20), nullable=False, default="stdio")  # stdio | function | sql
+    stdin = Column(Text, nullable=False, default="")
+    # Expression evaluated after the answer (kind=function) or the reference query (kind=sql).
+    call = Column(Text, nullable=True)
+    expected_output = Column(Text, nullable=False)  # unused for kind=sql; compared against the reference run
+    ordered = Column(Boolean, nullable=False, default=False)  # kind=sql: row order must match too
+    points = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    question = relationship("Question", back_populates="test_cases")
+
+
+class GradingResult(Base):
+    __tablename__ = "grading_results"
+    __table_args__ = (UniqueConstraint("submission_id", "test_case_id", name="uq_submission_test_case"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False, index=True)
+    test_case_id = Column(Integer, ForeignKey("test_cases.id"), nullable=False, index=True)
+    passed = Column(Boolean, nullable=False, default=False)
+    runtime_ms = Column(Integer, nullable=True)
+    timed_out = Column(Boolean, nullable=False, default=False)
+    actual_output = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    graded_at = Column(DateTime, default=datetime.utcnow)
+
+    submission = relationship("Submission", back_populates="grading_results")
+    test_case = relationship("TestCase")
+
+
+class RegradeJob(Base):
+    __tablename__ = "regrade_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued | running | completed | failed
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    html_body = Column(Text, nullable=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending | sending | sent | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    # When a pending row may next be tried; for a "sending" row, when its claim lapses.
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = Column(String(32), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(120), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
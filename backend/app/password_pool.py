@@ -0,0 +1,73 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .auth import hash_password, verify_password
+from .config import settings
+
+
+class PasswordPoolBusyError(Exception):
+    pass
+
+
+class PasswordHasherPool:
+    """
+    Runs bcrypt in a few dedicated processes so a burst of logins neither
+    holds the GIL nor ties up the request threadpool. Like ExecutionGate, it
+    caps how many calls may wait and rejects the rest immediately.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(workers)
+        self._pending = 0
+        # Never fork the threaded server process itself (see python_pool).
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+    async def _run(self, func, *args):
+        if self._pending >= self.workers + self.max_queue:
+            raise PasswordPoolBusyError("Too many logins in progress. Please retry shortly.")
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        # The cost is passed along so the workers never use a stale setting.
+        return await self._run(hash_password, password, settings.bcrypt_rounds)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: PasswordHasherPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool() -> PasswordHasherPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHasherPool(
+                    max(1, settings.password_hash_workers),
+                    settings.password_hash_max_queue,
+                )
+    return _pool
+
+
+def shutdown_password_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,452 @@
+import builtins
+import ctypes
+import errno
+import io
+import linecache
+import math
+import multiprocessing
+import os
+import pickle
+import queue
+import random
+import signal
+import sys
+import threading
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows: only the wall-clock timeout and output cap apply.
+    resource = None
+
+
+# Never fork the threaded server process itself. Where available, a fork
+# server is started once and each worker is forked from it, which skips
+# interpreter startup; plain spawn (Windows) starts a fresh interpreter.
+if "forkserver" in multiprocessing.get_all_start_methods():
+    _SPAWN = multiprocessing.get_context("forkserver")
+    _SPAWN.set_forkserver_preload([__name__])
+else:
+    _SPAWN = multiprocessing.get_context("spawn")
+_BOOT_TIMEOUT_SECONDS = 60
+# The worker enforces the run timeout itself; the parent only gives up on a
+# worker that has not answered this long after it.
+_REPLY_GRACE_SECONDS = 2
+
+# Where fork() exists, every job runs in a child forked from the warm worker
+# and thrown away afterwards, so nothing one run changes (builtins, module
+# attributes, caches) is seen by the next. Without fork (Windows) the job runs
+# in the worker itself, which is then recycled after any limit hit.
+_FORK_JOBS = hasattr(os, "fork")
+_PR_SET_PDEATHSIG = 1
+
+
+def _format_exception(exc: BaseException) -> str:
+    # Drop the worker's own exec() frame so tracebacks look like a plain script run.
+    tb = exc.__traceback__.tb_next if exc.__traceback__ else None
+    return "".join(traceback.format_exception(type(exc), exc, tb))
+
+
+class _LimitExceeded(BaseException):
+    # BaseException so candidate code catching Exception cannot swallow it.
+    def __init__(self, limit: str):
+        super().__init__(limit)
+        self.limit = limit
+
+
+class _CappedOutput(io.StringIO):
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.remaining = max_bytes if max_bytes > 0 else math.inf
+
+    def write(self, text: str) -> int:
+        size = len(text.encode("utf-8", errors="replace"))
+        if size <= self.remaining:
+            self.remaining -= size
+            return super().write(text)
+        kept = text.encode("utf-8", errors="replace")[: int(self.remaining)].decode("utf-8", errors="ignore")
+        super().write(kept)
+        self.remaining = 0
+        raise _LimitExceeded("output")
+
+    def note(self, text: str):
+        # Runner messages (tracebacks, limit notices) bypass the cap.
+        super().write(text)
+
+
+LIMIT_MESSAGES = {
+    "wall_time": "Execution timed out after {timeout} seconds.",
+    "cpu": "CPU time limit exceeded.",
+    "memory": "Memory limit exceeded.",
+    "output": "Output limit exceeded; output was truncated.",
+    "file_size": "File size limit exceeded.",
+}
+
+
+def _set_limit(kind: int, value: int, soft_only: bool = False):
+    if value <= 0:
+        return
+    _, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(kind, (value, hard if soft_only else value))
+
+
+def apply_process_limits(limits: dict, cpu: bool = True, processes: bool = True):
+    """
+    Applies memory, process-count and file-size limits (and, for one-off
+    subprocesses, CPU time) to the calling process.
+    """
+    if resource is None:
+        return
+    _set_limit(resource.RLIMIT_AS, limits["memory_mb"] * 1024 * 1024)
+    if processes:
+        _set_limit(resource.RLIMIT_NPROC, limits["max_processes"])
+    _set_limit(resource.RLIMIT_FSIZE, limits["file_size_mb"] * 1024 * 1024)
+    if cpu and limits["cpu_seconds"] > 0:
+        # SIGXCPU at the soft limit, SIGKILL a second later if it is ignored.
+        _set_limit(resource.RLIMIT_CPU, limits["cpu_seconds"] + 1)
+        _set_limit(resource.RLIMIT_CPU, limits["cpu_seconds"], soft_only=True)
+
+
+def limit_from_returncode(return_code: int | None) -> str | None:
+    if return_code is None or return_code >= 0:
+        return None
+    signum = -return_code
+    if signum == getattr(signal, "SIGXCPU", None):
+        return "cpu"
+    if signum == getattr(signal, "SIGXFSZ", None):
+        return "file_size"
+    return None
+
+
+_cpu_armed = False
+
+
+def _on_cpu_limit(signum, frame):
+    if _cpu_armed:
+        raise _LimitExceeded("cpu")
+
+
+def _arm_cpu_limit(seconds: int):
+    # A warm worker's CPU counter keeps growing, so each run gets a soft limit
+    # relative to what has been used so far. The hard limit is left alone so
+    # it can be lifted again afterwards.
+    global _cpu_armed
+    if resource is None or seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _set_limit(resource.RLIMIT_CPU, math.ceil(usage.ru_utime + usage.ru_stime) + seconds, soft_only=True)
+    _cpu_armed = True
+
+
+def _disarm_cpu_limit():
+    global _cpu_armed
+    _cpu_armed = False
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def _execute(code: str, stdin: str, limits: dict) -> dict:
+    stdout = _CappedOutput(limits["output_bytes"])
+    stderr = _CappedOutput(limits["output_bytes"])
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    saved = sys.stdin, sys.stdout, sys.stderr
+    sys.stdin, sys.stdout, sys.stderr = io.StringIO(stdin), stdout, stderr
+    return_code = 0
+    limit_hit = None
+    # Lets tracebacks show the offending source line, as they would for a file on disk.
+    linecache.cache["solution.py"] = (len(code), None, code.splitlines(True), "solution.py")
+    _arm_cpu_limit(limits["cpu_seconds"])
+    try:
+        exec(compile(code, "solution.py", "exec"), namespace)
+    except _LimitExceeded as exc:
+        limit_hit = exc.limit
+        return_code = -1
+    except SystemExit as exc:
+        if exc.code is None:
+            return_code = 0
+        elif isinstance(exc.code, int):
+            return_code = exc.code
+        else:
+            stderr.note(f"{exc.code}\n")
+            return_code = 1
+    except MemoryError as exc:
+        limit_hit = "memory"
+        stderr.note(_format_exception(exc))
+        return_code = 1
+    except BaseException as exc:  # noqa: BLE001 - candidate code may raise anything
+        if isinstance(exc, OSError) and exc.errno == errno.EFBIG:
+            limit_hit = "file_size"
+        stderr.note(_format_exception(exc))
+        return_code = 1
+    finally:
+        _disarm_cpu_limit()
+        sys.stdin, sys.stdout, sys.stderr = saved
+    if limit_hit:
+        stderr.note(LIMIT_MESSAGES[limit_hit] + "\n")
+    return {
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "return_code": return_code,
+        "timed_out": False,
+        "limit_hit": limit_hit,
+    }
+
+
+def _timeout_result(timeout: float) -> dict:
+    return {
+        "stdout": "",
+        "stderr": LIMIT_MESSAGES["wall_time"].format(timeout=f"{timeout:g}"),
+        "return_code": -1,
+        "timed_out": True,
+        "limit_hit": "wall_time",
+    }
+
+
+def _crash_result(limit_hit: str | None) -> dict:
+    return {
+        "stdout": "",
+        "stderr": LIMIT_MESSAGES[limit_hit] if limit_hit else "Execution worker crashed.",
+        "return_code": -1,
+        "timed_out": False,
+        "limit_hit": limit_hit,
+    }
+
+
+def _die_with_parent():
+    # Linux only: a job child must not outlive a worker that was killed.
+    if sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL(None, use_errno=True).prctl(_PR_SET_PDEATHSIG, signal.SIGKILL)
+        except (OSError, AttributeError):
+            pass
+
+
+def _job_child(writer, job: dict, limits: dict):
+    status = 70
+    try:
+        _die_with_parent()
+        if resource is not None:
+            # Applied here rather than in the worker, which must still fork.
+            _set_limit(resource.RLIMIT_NPROC, limits["max_processes"])
+        saved_builtins = dict(builtins.__dict__)
+        result = _execute(job["code"], job["stdin"], limits)
+        # Candidate code may have replaced builtins the pipe itself relies on.
+        builtins.__dict__.clear()
+        builtins.__dict__.update(saved_builtins)
+        writer.send(result)
+        status = 0
+    finally:
+        os._exit(status)
+
+
+def _run_forked(job: dict, limits: dict) -> bytes:
+    """Runs one job in a throwaway child. Returns the pickled result."""
+    reader, writer = multiprocessing.Pipe(duplex=False)
+    pid = os.fork()
+    if pid == 0:
+        reader.close()
+        _job_child(writer, job, limits)
+    writer.close()
+    try:
+        if not reader.poll(job["timeout"]):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return pickle.dumps(_timeout_result(job["timeout"]))
+        try:
+            # Passed on unread: the worker never unpickles what the job produced.
+            raw = reader.recv_bytes()
+        except EOFError:
+            raw = None
+        _, status = os.waitpid(pid, 0)
+        if raw is None:
+            return pickle.dumps(_crash_result(limit_from_returncode(os.waitstatus_to_exitcode(status))))
+        return raw
+    finally:
+        reader.close()
+
+
+def _worker_main(conn, limits: dict):
+    try:
+        if resource is not None:
+            apply_process_limits(limits, cpu=False, processes=not _FORK_JOBS)
+            signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        conn.send("ready")
+        while True:
+            job = conn.recv()
+            if job is None:
+                return
+            if _FORK_JOBS:
+                conn.send_bytes(_run_forked(job, limits))
+            else:
+                conn.send(_execute(job["code"], job["stdin"], limits))
+    except (EOFError, OSError):
+        # Parent went away (shutdown or recycle); nothing left to report to.
+        return
+
+
+class _Worker:
+    def __init__(self, max_runs: int, limits: dict):
+        parent_conn, child_conn = _SPAWN.Pipe()
+        self.conn = parent_conn
+        self.process = _SPAWN.Process(target=_worker_main, args=(child_conn, limits), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+        self.ready = False
+        # Spread recycling out so workers started together do not all
+        # restart at the same moment and leave the pool empty.
+        self.max_runs = random.randint(max(1, max_runs // 2), max(1, max_runs))
+
+    def wait_ready(self):
+        # Boot time must not count against a candidate's run timeout.
+        if self.ready:
+            return
+        if not self.conn.poll(_BOOT_TIMEOUT_SECONDS):
+            raise OSError("Execution worker failed to start")
+        self.conn.recv()
+        self.ready = True
+
+    def run(self, code: str, stdin: str, timeout: float) -> dict | None:
+        self.wait_ready()
+        self.runs += 1
+        self.conn.send({"code": code, "stdin": stdin, "timeout": timeout})
+        if not self.conn.poll(timeout + _REPLY_GRACE_SECONDS):
+            return None
+        return self.conn.recv()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def kill(self) -> int | None:
+        self.conn.close()
+        self.process.kill()
+        self.process.join()
+        return self.process.exitcode
+
+    def crash_exitcode(self) -> int | None:
+        # A worker taken down by a resource limit exits on its own; give it a
+        # moment so the signal that killed it can be reported.
+        self.process.join(timeout=0.5)
+        return self.process.exitcode
+
+
+class PythonWorkerPool:
+    """
+    Keeps a fixed number of pre-started interpreters warm so a run does not pay
+    interpreter startup. Each job runs in a child forked from a worker (see
+    _FORK_JOBS). A worker is replaced after `max_runs` jobs, when it stops
+    answering or its pipe breaks, and, without fork, after any limit hit.
+    """
+
+    def __init__(self, size: int, max_runs: int, limits: dict):
+        self.size = size
+        self.max_runs = max_runs
+        self.limits = limits
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(_Worker(self.max_runs, self.limits))
+
+    def run(self, code: str, stdin: str, timeout: float) -> dict:
+        try:
+            worker = self._idle.get(timeout=_BOOT_TIMEOUT_SECONDS)
+        except queue.Empty:
+            return _crash_result(None)
+        result = None
+        try:
+            result = worker.run(code, stdin, timeout)
+        except Exception:  # noqa: BLE001 - a broken pipe or an unreadable reply
+            result = _crash_result(limit_from_returncode(worker.crash_exitcode()))
+            worker.kill()
+            worker = None
+        finally:
+            # Without fork, a worker that hit a limit may be left in a bad
+            # state (e.g. after a MemoryError); never hand it to the next run.
+            self._release(
+                worker,
+                healthy=result is not None and (_FORK_JOBS or not result["limit_hit"]),
+            )
+
+        if result is None:
+            return _timeout_result(timeout)
+        return result
+
+    def _release(self, worker: _Worker | None, healthy: bool):
+        if worker is not None and (not healthy or worker.runs >= worker.max_runs or self._closed):
+            if healthy:
+                worker.stop()
+            else:
+                worker.kill()
+            worker = None
+        if self._closed:
+            return
+        if worker is not None:
+            self._idle.put(worker)
+        else:
+            # Spawning takes a moment; do it off the request path.
+            threading.Thread(target=self._replace, daemon=True).start()
+
+    def _replace(self):
+        # Keeps trying: a worker that is never replaced would leave the pool
+        # short for good.
+        delay = 1
+        while not self._closed:
+            worker = None
+            try:
+                worker = _Worker(self.max_runs, self.limits)
+                worker.wait_ready()
+            except Exception as exc:  # noqa: BLE001 - retried below
+                if worker is not None:
+                    worker.kill()
+                print(f"[PYTHON POOL] Could not start a worker: {exc}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+            if self._closed:
+                worker.stop()
+                return
+            self._idle.put(worker)
+            return
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.stop()
+
+
+_pool: PythonWorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(size: int, max_runs: int, limits: dict) -> PythonWorkerPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PythonWorkerPool(size, max_runs, limits)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
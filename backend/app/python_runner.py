@@ -1,10 +1,23 @@
 import ast
+import asyncio
+import codecs
+import errno
+import json
+import os
 import shutil
-import subprocess
 import sys
 import tempfile
 from pathlib import Path
 
+from .config import settings
+from .execution_gate import get_gate
+from .python_pool import LIMIT_MESSAGES, get_pool, limit_from_returncode
+from .result_cache import content_key, get_execution_cache
+
+
+# Part of every cache key; bump when sandbox behaviour changes so stale
+# results are not served.
+RUNNER_VERSION = f"3|py{sys.version_info.major}.{sys.version_info.minor}"
 
 BANNED_IMPORTS = {
     "os",
@@ -25,6 +38,18 @@ BANNED_IMPORTS = {
 
 BANNED_CALLS = {"eval", "exec", "__import__", "open", "compile", "input"}
 
+# Streaming runs start a fresh interpreter for each run. The limits are set by
+# this bootstrap inside the new process, which then execs the solution with
+# them in place; no Python code runs between fork and exec in the server.
+_LIMITS_BOOTSTRAP = (
+    "import json, os, sys\n"
+    "sys.path.insert(0, sys.argv[1])\n"
+    "from app.python_pool import apply_process_limits\n"
+    "apply_process_limits(json.loads(sys.argv[2]))\n"
+    "os.execv(sys.executable, [sys.executable, '-u', sys.argv[3]])\n"
+)
+_BACKEND_DIR = str(Path(__file__).resolve().parent.parent)
+
 
 def _validate_code(code: str):
     tree = ast.parse(code)
@@ -59,48 +84,252 @@ def _resolve_python_cmd() -> str | None:
     return None
 
 
+def sandbox_limits() -> dict:
+    return {
+        "cpu_seconds": settings.python_cpu_seconds,
+        "memory_mb": settings.python_memory_mb,
+        "max_processes": settings.python_max_processes,
+        "file_size_mb": settings.python_max_file_mb,
+        "output_bytes": settings.python_max_output_bytes,
+    }
+
+
+def _cache_key(code: str, stdin: str, timeout: int) -> str:
+    limits = ",".join(f"{name}={value}" for name, value in sorted(sandbox_limits().items()))
+    return content_key("python", RUNNER_VERSION, str(timeout), limits, code, stdin)
+
+
+def _remember(key: str, result: dict):
+    # Timeouts and worker crashes (return_code -1) may be transient; let the
+    # next run try again.
+    if not result["timed_out"] and result["return_code"] != -1:
+        get_execution_cache().set(key, result)
+
+
 def run_python_code(code: str, stdin: str = "", timeout: int = 5):
     _validate_code(code)
 
-    python_cmd = _resolve_python_cmd()
-    if not python_cmd:
+    key = _cache_key(code, stdin, timeout)
+    cached = get_execution_cache().get(key)
+    if cached is not None:
+        return cached
+    result = _run_python_code_uncached(code, stdin, timeout)
+    _remember(key, result)
+    return result
+
+
+def _run_python_code_uncached(code: str, stdin: str, timeout: int):
+    if settings.python_pool_size > 0:
+        pool = get_pool(settings.python_pool_size, settings.python_pool_max_runs, sandbox_limits())
+        return pool.run(code, stdin, timeout)
+    # Grading threads have no event loop of their own; reuse the async runner
+    # so both paths enforce the same limits.
+    return asyncio.run(_run_subprocess_async(code, stdin, timeout))
+
+
+async def run_python_code_async(code: str, stdin: str = "", timeout: int = 5):
+    _validate_code(code)
+
+    # Cache hits never take an execution slot.
+    key = _cache_key(code, stdin, timeout)
+    cached = get_execution_cache().get(key)
+    if cached is not None:
+        return cached
+
+    gate = get_gate(settings.execution_max_concurrency, settings.execution_max_queue)
+    async with gate.slot():
+        if settings.python_pool_size > 0:
+            pool = get_pool(settings.python_pool_size, settings.python_pool_max_runs, sandbox_limits())
+            result = await gate.run_blocking(pool.run, code, stdin, timeout)
+        else:
+            result = await _run_subprocess_async(code, stdin, timeout)
+    _remember(key, result)
+    return result
+
+
+async def stream_python_code(code: str, stdin: str = "", timeout: int = 5):
+    """
+    Runs code in a fresh subprocess (never the warm pool, which cannot stream)
+    and yields a "start" event once a slot is free, stdout/stderr chunks as
+    they are produced, then a final "exit" event. Closing the generator (e.g. the
+    client went away) kills the child and frees the execution slot at once.
+    Shares the result cache with run_python_code_async(): a cached result is
+    replayed without a slot, and a finished run is remembered.
+    """
+    _validate_code(code)
+    key = _cache_key(code, stdin, timeout)
+    cached = get_execution_cache().get(key)
+    if cached is not None:
+        yield {"type": "start"}
+        for stream in ("stdout", "stderr"):
+            if cached[stream]:
+                yield {"type": stream, "data": cached[stream]}
+        yield {"type": "exit", **{k: cached[k] for k in ("return_code", "timed_out", "limit_hit")}}
+        return
+
+    gate = get_gate(settings.execution_max_concurrency, settings.execution_max_queue)
+    output = {"stdout": [], "stderr": []}
+    async with gate.slot():
+        yield {"type": "start"}
+        async for event in _subprocess_events(code, stdin, timeout):
+            if event["type"] == "exit":
+                _remember(
+                    key,
+                    {
+                        "stdout": "".join(output["stdout"]),
+                        "stderr": "".join(output["stderr"]),
+                        **{k: event[k] for k in ("return_code", "timed_out", "limit_hit")},
+                    },
+                )
+            else:
+                output[event["type"]].append(event["data"])
+            yield event
+
+
+async def _run_subprocess_async(code: str, stdin: str, timeout: int):
+    stdout: list[str] = []
+    stderr: list[str] = []
+    async for event in _subprocess_events(code, stdin, timeout):
+        if event["type"] == "stdout":
+            stdout.append(event["data"])
+        elif event["type"] == "stderr":
+            stderr.append(event["data"])
+        else:
+            result = event
+    if result["timed_out"]:
         return {
             "stdout": "",
-            "stderr": "Python interpreter not found on server.",
+            "stderr": LIMIT_MESSAGES["wall_time"].format(timeout=timeout),
             "return_code": -1,
-            "timed_out": False,
+            "timed_out": True,
+            "limit_hit": "wall_time",
         }
+    return {
+        "stdout": "".join(stdout),
+        "stderr": "".join(stderr),
+        "return_code": result["return_code"],
+        "timed_out": False,
+        "limit_hit": result["limit_hit"],
+    }
+
+
+def _limit_from_stderr(stderr: str) -> str | None:
+    last_line = stderr.rstrip().rpartition("\n")[2]
+    if last_line.startswith("MemoryError"):
+        return "memory"
+    if f"[Errno {errno.EFBIG}]" in last_line:
+        return "file_size"
+    return None
+
+
+async def _pump(stream: asyncio.StreamReader, name: str, events: asyncio.Queue, max_bytes: int):
+    # Stops reading as soon as the stream goes past max_bytes, so a runaway
+    # print loop never buffers more than the cap.
+    total = 0
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            await events.put((name, None))
+            return
+        if max_bytes > 0 and total + len(chunk) > max_bytes:
+            await events.put((name, chunk[: max_bytes - total]))
+            await events.put(("limit", "output"))
+            return
+        total += len(chunk)
+        await events.put((name, chunk))
+
 
+async def _subprocess_events(code: str, stdin: str, timeout: int):
+    python_cmd = _resolve_python_cmd()
+    if not python_cmd:
+        yield {"type": "stderr", "data": "Python interpreter not found on server."}
+        yield {"type": "exit", "return_code": -1, "timed_out": False, "limit_hit": None}
+        return
+
+    limits = sandbox_limits()
     with tempfile.TemporaryDirectory() as tmpdir:
         file_path = Path(tmpdir) / "solution.py"
         file_path.write_text(code, encoding="utf-8")
 
         try:
-            result = subprocess.run(
-                [python_cmd, str(file_path)],
-                input=stdin,
-                text=True,
-                capture_output=True,
-                timeout=timeout,
-                check=False,
+            # -u so output reaches the pipe as it is printed, not at exit.
+            if os.name == "posix":
+                args = ["-c", _LIMITS_BOOTSTRAP, _BACKEND_DIR, json.dumps(limits), str(file_path)]
+            else:
+                args = ["-u", str(file_path)]
+            proc = await asyncio.create_subprocess_exec(
+                python_cmd,
+                *args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
-            return {
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "return_code": result.returncode,
-                "timed_out": False,
-            }
-        except subprocess.TimeoutExpired:
-            return {
-                "stdout": "",
-                "stderr": "Execution timed out after 5 seconds.",
-                "return_code": -1,
-                "timed_out": True,
-            }
         except OSError as exc:
-            return {
-                "stdout": "",
-                "stderr": f"Execution failed: {exc}",
-                "return_code": -1,
-                "timed_out": False,
-            }
+            yield {"type": "stderr", "data": f"Execution failed: {exc}"}
+            yield {"type": "exit", "return_code": -1, "timed_out": False, "limit_hit": None}
+            return
+
+        try:
+            proc.stdin.write(stdin.encode("utf-8"))
+            await proc.stdin.drain()
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+        events: asyncio.Queue = asyncio.Queue()
+        pumps = [
+            asyncio.ensure_future(_pump(proc.stdout, "stdout", events, limits["output_bytes"])),
+            asyncio.ensure_future(_pump(proc.stderr, "stderr", events, limits["output_bytes"])),
+        ]
+        decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in ("stdout", "stderr")}
+        stderr_tail = ""
+        limit_hit = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            open_streams = 2
+            while open_streams:
+                try:
+                    name, data = await asyncio.wait_for(events.get(), max(0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    limit_hit = "wall_time"
+                    break
+                if name == "limit":
+                    limit_hit = data
+                    break
+                if data is None:
+                    open_streams -= 1
+                    continue
+                text = decoders[name].decode(data)
+                if name == "stderr":
+                    stderr_tail = (stderr_tail + text)[-1024:]
+                if text:
+                    yield {"type": name, "data": text}
+            if limit_hit is None:
+                try:
+                    await asyncio.wait_for(proc.wait(), max(0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    limit_hit = "wall_time"
+        finally:
+            for pump in pumps:
+                pump.cancel()
+            if proc.returncode is None:
+                proc.kill()
+            # Drain what is left in the pipes (at most a pipe buffer, since the
+            # child is dead); the transport only finishes once they are closed.
+            await proc.communicate()
+
+        return_code = proc.returncode
+        if limit_hit is None:
+            limit_hit = limit_from_returncode(return_code) or _limit_from_stderr(stderr_tail)
+        if limit_hit in ("wall_time", "output", "cpu") or return_code < 0:
+            # Killed rather than exited; report it the way the pool does.
+            return_code = -1
+        if limit_hit:
+            yield {"type": "stderr", "data": LIMIT_MESSAGES[limit_hit].format(timeout=timeout) + "\n"}
+        yield {
+            "type": "exit",
+            "return_code": return_code,
+            "timed_out": limit_hit == "wall_time",
+            "limit_hit": limit_hit,
+        }
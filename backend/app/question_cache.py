@@ -0,0 +1,81 @@
+import threading
+import time
+
+from sqlalchemy import Integer, String, cast, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import AppSetting, Question
+
+
+# Candidate question payloads (prompts with the Gemini key already filled in)
+# are rendered once per level and reused until the question bank version
+# changes. The version lives in app_settings so a write in one worker is seen
+# by every other worker within QUESTION_CACHE_CHECK_SECONDS; in the writing
+# worker the cache is dropped immediately.
+
+QUESTION_BANK_VERSION_KEY = "question_bank_version"
+GEMINI_KEY_SETTING = "gemini_api_key"
+
+_lock = threading.Lock()
+_payloads: dict[str, list[dict]] = {}
+_version: str | None = None
+_checked_at = 0.0
+# Bumped whenever the cache is dropped, so a render that raced with an
+# invalidation is not stored.
+_generation = 0
+
+
+def bump_question_bank_version(db: Session):
+    """Marks cached payloads stale. Call before committing the write."""
+    global _checked_at, _generation
+    result = db.execute(
+        update(AppSetting)
+        .where(AppSetting.key == QUESTION_BANK_VERSION_KEY)
+        .values(value=cast(cast(AppSetting.value, Integer) + 1, String))
+    )
+    if result.rowcount == 0:
+        db.add(AppSetting(key=QUESTION_BANK_VERSION_KEY, value="1"))
+    with _lock:
+        _payloads.clear()
+        _generation += 1
+        _checked_at = 0.0
+
+
+def _render(db: Session, level: str) -> list[dict]:
+    questions = db.query(Question).filter(Question.level == level).order_by(Question.order_no.asc()).all()
+    key_row = db.query(AppSetting).filter(AppSetting.key == GEMINI_KEY_SETTING).first()
+    gemini_key = key_row.value if key_row and key_row.value else settings.default_gemini_api_key
+    return [
+        {
+            "id": q.id,
+            "order_no": q.order_no,
+            "qtype": q.qtype,
+            "title": q.title,
+            "prompt": (q.prompt or "").replace("YOUR_API_KEY", gemini_key),
+            "dataset": q.dataset,
+        }
+        for q in questions
+    ]
+
+
+def get_question_payloads(db: Session, level: str) -> list[dict]:
+    global _version, _checked_at, _generation
+    now = time.monotonic()
+    if now - _checked_at >= settings.question_cache_check_seconds:
+        version = db.query(AppSetting.value).filter(AppSetting.key == QUESTION_BANK_VERSION_KEY).scalar()
+        with _lock:
+            if version != _version:
+                _payloads.clear()
+                _generation += 1
+                _version = version
+            _checked_at = now
+
+    payload = _payloads.get(level)
+    if payload is None:
+        generation = _generation
+        payload = _render(db, level)
+        with _lock:
+            if generation == _generation:
+                _payloads[level] = payload
+    return payload
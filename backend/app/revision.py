@@ -0,0 +1,80 @@
+from sqlalchemy import Integer, String, cast, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import AppSetting, Candidate, EvaluationMark, GradingResult, Question, Submission, TestCase
+
+
+# A single counter in app_settings that goes up on every commit touching data
+# the admin screens show. Read endpoints turn it into an ETag, so a poll that
+# finds nothing new is answered with a primary-key lookup and a 304. Being a
+# row in the database, it is shared by every worker process.
+#
+# Answer autosaves are left out: they arrive every few seconds per active
+# candidate, and counting them would change the ETag on nearly every poll and
+# queue every writer on the one counter row. Statements run with the
+# execution option track_revision=False are not counted; the submit that
+# follows flips is_submitted and bumps the counter as usual.
+
+REVISION_KEY = "data_revision"
+TRACKED_MODELS = (Candidate, Submission, EvaluationMark, GradingResult, Question, TestCase)
+_TRACKED_TABLES = {model.__table__ for model in TRACKED_MODELS}
+
+
+def mark_changed(db: Session):
+    db.info["revision_changed"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_unit_of_work(session: Session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            mark_changed(session)
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statements(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements never pass through the flush.
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if not orm_execute_state.execution_options.get("track_revision", True):
+        return
+    if getattr(orm_execute_state.statement, "table", None) in _TRACKED_TABLES:
+        mark_changed(orm_execute_state.session)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_revision(session: Session):
+    # Pending objects are normally only flushed by the commit itself, after
+    # this hook; flush now so after_flush has seen them.
+    session.flush()
+    if not session.info.pop("revision_changed", False):
+        return
+    # Incremented in SQL so concurrent workers never lose an update.
+    session.execute(
+        update(AppSetting)
+        .where(AppSetting.key == REVISION_KEY)
+        .values(value=cast(cast(AppSetting.value, Integer) + 1, String))
+    )
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session: Session):
+    session.info.pop("revision_changed", None)
+
+
+def current_revision(db: Session) -> str:
+    value = db.query(AppSetting.value).filter(AppSetting.key == REVISION_KEY).scalar()
+    return value or "0"
+
+
+async def current_revision_async(db: AsyncSession) -> str:
+    value = await db.scalar(select(AppSetting.value).where(AppSetting.key == REVISION_KEY))
+    return value or "0"
+
+
+def seed_revision(db: Session):
+    if not db.query(AppSetting.key).filter(AppSetting.key == REVISION_KEY).first():
+        db.add(AppSetting(key=REVISION_KEY, value="0"))
+        db.commit()
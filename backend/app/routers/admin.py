@@ -1,26 +1,59 @@
-from datetime import datetime, timedelta
+import base64
+import csv
+import io
+import json
+import re
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import case, func, insert, select, tuple_
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from ..config import settings
-from ..deps import get_current_admin, get_db
-from ..email_utils import send_email
-from ..models import AppSetting, Candidate, EvaluationMark, Question, Submission
+from ..database import SessionLocal
+from ..deps import get_admin_cache, get_async_db, get_current_admin, get_db
+from ..email_templates import render_email
+from ..email_utils import outbox_stats, queue_email, queue_emails, wake_email_dispatcher
+from ..grading import fail_stale_regrade_jobs, grade_candidate, regrade_job_progress, start_regrade_job
+from ..models import (
+    AppSetting,
+    Candidate,
+    EvaluationMark,
+    GradingResult,
+    Question,
+    RegradeJob,
+    Submission,
+    TestCase,
+)
+from ..question_cache import bump_question_bank_version
+from ..result_cache import get_execution_cache
+from ..revision import current_revision_async
 from ..schemas import (
+    AuthCacheStatsOut,
+    BulkInviteResponse,
     CandidateQuestionAnswerItem,
     CandidateSubmissionDetailOut,
     CandidateSubmissionGroup,
     CandidateSubmissionItem,
+    CandidateSubmissionPage,
+    CandidateSummaryPage,
+    EmailOutboxStatsOut,
+    ExecutionCacheStatsOut,
     GeminiAPIKeyIn,
     GeminiAPIKeyOut,
+    GradeCandidateOut,
     InviteCandidateRequest,
     InviteCandidateResponse,
+    RegradeJobOut,
     SaveCandidateMarksIn,
     SaveCandidateMarksOut,
+    TestCaseResultItem,
 )
 
 
@@ -57,6 +90,20 @@ def _normalize_reviewer_emails(reviewer_emails: list[str]) -> list[str]:
     return normalized
 
 
+def _suggested_marks_select():
+    # Over every grading result, so a graded candidate who passed nothing gets
+    # 0 like in the detail view; only ungraded candidates have no row.
+    return (
+        select(
+            Submission.candidate_id,
+            func.sum(case((GradingResult.passed.is_(True), TestCase.points), else_=0)).label("suggested_marks"),
+        )
+        .join(GradingResult, GradingResult.submission_id == Submission.id)
+        .join(TestCase, TestCase.id == GradingResult.test_case_id)
+        .group_by(Submission.candidate_id)
+    )
+
+
 def _reviewer_names_from_csv(csv_value: str | None) -> list[str]:
     if not csv_value:
         return []
@@ -90,10 +137,22 @@ def update_gemini_key(
         row.value = payload.gemini_api_key.strip()
     else:
         db.add(AppSetting(key=GEMINI_KEY_SETTING, value=payload.gemini_api_key.strip()))
+    bump_question_bank_version(db)
     db.commit()
     return {"gemini_api_key": payload.gemini_api_key.strip()}
 
 
+def _invite_email(name: str, test_level: str, test_duration_minutes: int, invite_link: str, expires_at: datetime) -> dict:
+    return render_email(
+        "invite",
+        name=name,
+        test_level=(test_level or "").capitalize(),
+        test_duration_minutes=test_duration_minutes,
+        expires_at=expires_at.strftime("%d %b %Y, %I:%M %p UTC"),
+        invite_link=invite_link,
+    )
+
+
 @router.post("/invite", response_model=InviteCandidateResponse)
 def invite_candidate(
     payload: InviteCandidateRequest,
@@ -117,6 +176,14 @@ def invite_candidate(
         is_submitted=False,
     )
     db.add(candidate)
+
+    invite_link = f"{settings.frontend_base_url}/candidate/{token}"
+    queue_email(
+        db,
+        to_email=candidate.email,
+        **_invite_email(payload.name, payload.test_level, payload.test_duration_minutes, invite_link, expires_at),
+    )
+
     try:
         db.commit()
         db.refresh(candidate)
@@ -126,49 +193,7 @@ def invite_candidate(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Candidate with this email already exists. Use a different email or delete old entry first.",
         )
-
-    invite_link = f"{settings.frontend_base_url}/candidate/{token}"
-    expires_at_str = expires_at.strftime("%d %b %Y, %I:%M %p UTC")
-    test_level_label = (candidate.test_level or "").capitalize()
-    send_email(
-        to_email=candidate.email,
-        subject="Machine Test Invitation",
-        body=(
-            f"Hi {candidate.name},\n\n"
-            "You have been invited to take the Machine Test Platform assessment.\n\n"
-            f"Test level: {test_level_label}\n"
-            f"Test duration: {candidate.test_duration_minutes} minutes\n"
-            f"Invite link: {invite_link}\n"
-            f"Link expires at: {expires_at_str}\n\n"
-            "Important:\n"
-            "- Use this unique link only once.\n"
-            "- Keep stable internet during the test.\n"
-            "- Fullscreen policy may be enforced.\n\n"
-            "Best of luck."
-        ),
-        html_body=(
-            "<div style=\"font-family:Arial,sans-serif;background:#f4f7fb;padding:24px;color:#0f172a;\">"
-            "<div style=\"max-width:620px;margin:0 auto;background:#ffffff;border:1px solid #e2e8f0;border-radius:14px;overflow:hidden;\">"
-            "<div style=\"background:linear-gradient(135deg,#0f172a,#1d4ed8);padding:20px 24px;color:#ffffff;\">"
-            "<h2 style=\"margin:0;font-size:22px;\">Machine Test Invitation</h2>"
-            "<p style=\"margin:8px 0 0;opacity:0.9;\">You are invited to start your assessment.</p>"
-            "</div>"
-            "<div style=\"padding:22px 24px;line-height:1.6;\">"
-            f"<p style=\"margin-top:0;\">Hi <strong>{candidate.name}</strong>,</p>"
-            "<p>You have been invited to take the Machine Test Platform assessment.</p>"
-            "<div style=\"background:#f8fafc;border:1px solid #e2e8f0;border-radius:10px;padding:14px 16px;\">"
-            f"<div><strong>Test level:</strong> {test_level_label}</div>"
-            f"<div><strong>Test duration:</strong> {candidate.test_duration_minutes} minutes</div>"
-            f"<div><strong>Link expiry:</strong> {expires_at_str}</div>"
-            "</div>"
-            f"<p style=\"margin:18px 0;\"><a href=\"{invite_link}\" style=\"display:inline-block;background:#2563eb;color:#ffffff;text-decoration:none;padding:10px 16px;border-radius:8px;font-weight:600;\">Start Test</a></p>"
-            f"<p style=\"word-break:break-all;margin:0 0 12px;\"><strong>Direct link:</strong> <a href=\"{invite_link}\">{invite_link}</a></p>"
-            "<p style=\"margin:0;font-size:13px;color:#475569;\">Important: Use this unique link only once and keep stable internet during the test.</p>"
-            "</div>"
-            "</div>"
-            "</div>"
-        ),
-    )
+    wake_email_dispatcher()
 
     return {
         "candidate_id": candidate.id,
@@ -177,6 +202,152 @@ def invite_candidate(
     }
 
 
+BULK_INVITE_INT_FIELDS = ("interview_marks", "test_duration_minutes")
+
+
+def _parse_invite_upload(filename: str, raw: bytes) -> list[dict]:
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload must be UTF-8 encoded")
+
+    if filename.lower().endswith(".json") or text.lstrip().startswith(("[", "{")):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON: {exc}")
+        if isinstance(data, dict):
+            data = data.get("candidates")
+        if not isinstance(data, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="JSON upload must be a list of candidates or {\"candidates\": [...]}",
+            )
+        return [row if isinstance(row, dict) else {} for row in data]
+
+    records = []
+    for row in csv.DictReader(io.StringIO(text)):
+        record = {}
+        for key, value in row.items():
+            if key is None:
+                continue
+            key = key.strip().lower()
+            value = (value or "").strip()
+            if not value:
+                continue
+            if key == "reviewer_emails":
+                record[key] = [x for x in re.split(r"[;,|\s]+", value) if x]
+            elif key in BULK_INVITE_INT_FIELDS and value.isdigit():
+                record[key] = int(value)
+            else:
+                record[key] = value
+        records.append(record)
+    return records
+
+
+def _describe_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+@router.post("/invite/bulk", response_model=BulkInviteResponse)
+def bulk_invite_candidates(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    _admin=Depends(get_current_admin),
+):
+    """
+    Invites every valid row of a CSV (header row with InviteCandidateRequest
+    field names; reviewer_emails separated by ";") or JSON upload. Rows are
+    validated up front, valid ones are inserted in one transaction together
+    with their invitation emails, and a per-row report is returned.
+    """
+    records = _parse_invite_upload(file.filename or "", file.file.read())
+    if not records:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload contains no candidates")
+    if len(records) > settings.bulk_invite_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Upload has {len(records)} rows; the limit is {settings.bulk_invite_max_rows}",
+        )
+
+    expires_at = datetime.utcnow() + timedelta(hours=settings.invite_token_expire_hours)
+    results = []
+    candidate_rows = []
+    invited_results = []
+    seen_emails: set[str] = set()
+    for index, record in enumerate(records, start=1):
+        result = {"row": index, "email": str(record.get("email") or "") or None, "status": "invalid"}
+        results.append(result)
+        try:
+            payload = InviteCandidateRequest.model_validate(record)
+            reviewer_emails = _normalize_reviewer_emails([str(e) for e in payload.reviewer_emails])
+        except ValidationError as exc:
+            result["error"] = _describe_validation_error(exc)
+            continue
+        except HTTPException as exc:
+            result["error"] = exc.detail
+            continue
+        email_key = str(payload.email).lower()
+        if email_key in seen_emails:
+            result["error"] = "Duplicate email in upload"
+            continue
+        seen_emails.add(email_key)
+
+        token = uuid4().hex
+        result.update(status="invited", invite_link=f"{settings.frontend_base_url}/candidate/{token}")
+        invited_results.append(result)
+        candidate_rows.append(
+            {
+                "name": payload.name,
+                "email": str(payload.email),
+                "invite_token": token,
+                "token_expires_at": expires_at,
+                "test_level": payload.test_level,
+                "interview_marks": payload.interview_marks,
+                "interviewer_name": (payload.interviewer_name or "").strip() or None,
+                "reviewer_emails": ",".join(reviewer_emails) if reviewer_emails else None,
+                "test_duration_minutes": payload.test_duration_minutes,
+                "is_submitted": False,
+            }
+        )
+
+    if candidate_rows:
+        inserted = db.execute(
+            insert(Candidate).returning(Candidate.id, Candidate.invite_token),
+            candidate_rows,
+        ).all()
+        ids_by_token = {row.invite_token: row.id for row in inserted}
+        queue_emails(
+            db,
+            [
+                {
+                    "to_email": row["email"],
+                    **_invite_email(
+                        row["name"],
+                        row["test_level"],
+                        row["test_duration_minutes"],
+                        f"{settings.frontend_base_url}/candidate/{row['invite_token']}",
+                        expires_at,
+                    ),
+                }
+                for row in candidate_rows
+            ],
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Bulk invite conflicted with existing data")
+        wake_email_dispatcher()
+        for result, row in zip(invited_results, candidate_rows):
+            result["candidate_id"] = ids_by_token[row["invite_token"]]
+
+    invited = len(candidate_rows)
+    return {"invited": invited, "invalid": len(results) - invited, "results": results}
+
+
 @router.delete("/candidates/{candidate_id}")
 def delete_candidate(candidate_id: int, db: Session = Depends(get_db), _admin=Depends(get_current_admin)):
     candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
@@ -188,27 +359,139 @@ def delete_candidate(candidate_id: int, db: Session = Depends(get_db), _admin=De
     return {"message": "Candidate deleted successfully"}
 
 
-@router.get("/submissions", response_model=list[CandidateSubmissionGroup])
-def get_submissions(db: Session = Depends(get_db), _admin=Depends(get_current_admin)):
-    candidates = (
-        db.query(Candidate)
-        .options(
-            joinedload(Candidate.submissions).joinedload(Submission.question),
-            joinedload(Candidate.evaluation_marks),
-        )
-        .order_by(Candidate.created_at.desc())
-        .all()
+async def _admin_etag(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    _admin=Depends(get_current_admin),
+) -> str:
+    # Resolved before the endpoint body, so an unchanged poll never reaches the
+    # heavy queries or serialization.
+    etag = f'W/"{await current_revision_async(db)}"'
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return etag
+
+
+def _encode_cursor(created_at: datetime, candidate_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), candidate_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, candidate_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(candidate_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _candidate_list_filters(
+    level: Optional[Literal["fresher", "intermediate", "high"]] = None,
+    submitted: Optional[bool] = None,
+    reviewer: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> dict:
+    return {
+        "level": level,
+        "submitted": submitted,
+        "reviewer": reviewer,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+
+
+def _filter_candidates(
+    query,  # a Query or a select(); both have filter()
+    level: Optional[str] = None,
+    submitted: Optional[bool] = None,
+    reviewer: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    if level:
+        query = query.filter(Candidate.test_level == level)
+    if submitted is not None:
+        query = query.filter(Candidate.is_submitted.is_(submitted))
+    if reviewer:
+        # reviewer_emails is a normalized comma-separated list.
+        padded = "," + Candidate.reviewer_emails + ","
+        query = query.filter(padded.like(f"%,{reviewer.strip().lower()},%"))
+    if date_from:
+        query = query.filter(Candidate.created_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        query = query.filter(Candidate.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+def _candidate_counts_select(filters: dict):
+    """Total and submitted counts; run it with db.execute(...).one()."""
+    return _filter_candidates(
+        select(
+            func.count(Candidate.id),
+            func.coalesce(func.sum(case((Candidate.is_submitted.is_(True), 1), else_=0)), 0),
+        ),
+        **filters,
     )
 
-    data: list[CandidateSubmissionGroup] = []
-    for candidate in candidates:
-        time_taken_seconds = None
-        if candidate.test_started_at and candidate.submitted_at:
-            time_taken_seconds = max(
-                0,
-                int((candidate.submitted_at - candidate.test_started_at).total_seconds()),
+
+def _keyset_query(query, cursor: Optional[str], sort: str, limit: int):
+    # Rows must expose created_at and id (Candidate entities or labelled columns).
+    key = tuple_(Candidate.created_at, Candidate.id)
+    if cursor:
+        after = _decode_cursor(cursor)
+        query = query.filter(key < after if sort == "newest" else key > after)
+    order = (Candidate.created_at.desc(), Candidate.id.desc()) if sort == "newest" else (Candidate.created_at, Candidate.id)
+    # One extra row tells us whether there is a next page without a second count.
+    return query.order_by(*order).limit(limit + 1)
+
+
+def _keyset_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """Splits the rows of _keyset_query() into the page and the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def _time_taken_seconds(candidate) -> int | None:
+    if candidate.test_started_at and candidate.submitted_at:
+        return max(0, int((candidate.submitted_at - candidate.test_started_at).total_seconds()))
+    return None
+
+
+@router.get("/submissions", response_model=CandidateSubmissionPage)
+async def get_submissions(
+    limit: int = Query(default=25, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: Literal["newest", "oldest"] = "newest",
+    filters: dict = Depends(_candidate_list_filters),
+    db: AsyncSession = Depends(get_async_db),
+    _admin=Depends(get_current_admin),
+    _etag=Depends(_admin_etag),
+):
+    total, submitted_count = (await db.execute(_candidate_counts_select(filters))).one()
+    # Relationships are loaded eagerly here; an AsyncSession cannot lazy load.
+    stmt = _filter_candidates(select(Candidate), **filters).options(
+        selectinload(Candidate.submissions).joinedload(Submission.question),
+        selectinload(Candidate.evaluation_marks),
+    )
+    candidates, next_cursor = _keyset_page(
+        (await db.execute(_keyset_query(stmt, cursor, sort, limit))).scalars().all(), limit
+    )
+    suggested_by_candidate = dict(
+        (
+            await db.execute(
+                _suggested_marks_select().where(Submission.candidate_id.in_([c.id for c in candidates]))
             )
+        ).all()
+    )
 
+    data: list[CandidateSubmissionGroup] = []
+    for candidate in candidates:
         items: list[CandidateSubmissionItem] = []
         for sub in sorted(candidate.submissions, key=lambda s: s.question.order_no):
             if not (sub.answer_text or "").strip():
@@ -235,44 +518,278 @@ def get_submissions(db: Session = Depends(get_db), _admin=Depends(get_current_ad
                 test_duration_minutes=candidate.test_duration_minutes,
                 submission_reason=candidate.submission_reason,
                 submitted_at=candidate.submitted_at,
-                time_taken_seconds=time_taken_seconds,
+                time_taken_seconds=_time_taken_seconds(candidate),
                 machine_test_marks=machine_test_marks,
+                suggested_marks=suggested_by_candidate.get(candidate.id),
                 is_submitted=candidate.is_submitted,
                 submissions=items,
             )
         )
-    return data
+    return {
+        "items": data,
+        "total": total,
+        "submitted_count": submitted_count,
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/submissions/summary", response_model=CandidateSummaryPage)
+def get_submissions_summary(
+    limit: int = Query(default=25, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: Literal["newest", "oldest"] = "newest",
+    filters: dict = Depends(_candidate_list_filters),
+    db: Session = Depends(get_db),
+    _admin=Depends(get_current_admin),
+    _etag=Depends(_admin_etag),
+):
+    # Columns and aggregates are read as plain rows: no answer text and no ORM
+    # objects are loaded. Full answers come from /submissions/{candidate_id}.
+    # The page is fetched first, so the aggregates only cover its candidates.
+    query = db.query(
+        Candidate.id,
+        Candidate.created_at,
+        Candidate.name,
+        Candidate.email,
+        Candidate.test_level,
+        Candidate.interview_marks,
+        Candidate.interviewer_name,
+        Candidate.reviewer_emails,
+        Candidate.test_duration_minutes,
+        Candidate.submission_reason,
+        Candidate.test_started_at,
+        Candidate.submitted_at,
+        Candidate.is_submitted,
+    )
+    total, submitted_count = db.execute(_candidate_counts_select(filters)).one()
+    rows, next_cursor = _keyset_page(_keyset_query(_filter_candidates(query, **filters), cursor, sort, limit).all(), limit)
+
+    page_ids = [row.id for row in rows]
+    answered = dict(
+        db.query(Submission.candidate_id, func.count(Submission.id))
+        .filter(Submission.candidate_id.in_(page_ids), func.trim(Submission.answer_text) != "")
+        .group_by(Submission.candidate_id)
+        .all()
+    )
+    marks = dict(
+        db.query(EvaluationMark.candidate_id, func.sum(EvaluationMark.marks))
+        .filter(EvaluationMark.candidate_id.in_(page_ids))
+        .group_by(EvaluationMark.candidate_id)
+        .all()
+    )
+    suggested = dict(db.execute(_suggested_marks_select().where(Submission.candidate_id.in_(page_ids))).all())
+
+    return {
+        "items": [
+            {
+                "candidate_id": row.id,
+                "candidate_name": row.name,
+                "candidate_email": row.email,
+                "test_level": row.test_level,
+                "interview_marks": row.interview_marks,
+                "interviewer_name": row.interviewer_name,
+                "reviewer_names": _reviewer_names_from_csv(row.reviewer_emails),
+                "test_duration_minutes": row.test_duration_minutes,
+                "submission_reason": row.submission_reason,
+                "submitted_at": row.submitted_at,
+                "time_taken_seconds": _time_taken_seconds(row),
+                "machine_test_marks": marks.get(row.id) or 0,
+                "suggested_marks": suggested.get(row.id),
+                "is_submitted": row.is_submitted,
+                "answered_count": answered.get(row.id, 0),
+            }
+            for row in rows
+        ],
+        "total": total,
+        "submitted_count": submitted_count,
+        "next_cursor": next_cursor,
+    }
+
+
+EXPORT_COLUMNS = [
+    "candidate_id",
+    "candidate_name",
+    "candidate_email",
+    "test_level",
+    "is_submitted",
+    "submission_reason",
+    "test_started_at",
+    "submitted_at",
+    "time_taken_seconds",
+    "interview_marks",
+    "interviewer_name",
+    "reviewer_names",
+    "machine_test_marks",
+    "question_id",
+    "question_order",
+    "question_title",
+    "qtype",
+    "answer_text",
+    "answer_updated_at",
+    "question_marks",
+]
+EXPORT_BATCH_SIZE = 500
+
+
+def _export_rows(filters: dict):
+    # Runs inside the streaming response, after the request's own session is
+    # gone, so it owns its session. yield_per keeps only one batch in memory
+    # (and uses a server-side cursor on PostgreSQL).
+    db = SessionLocal()
+    try:
+        totals = (
+            db.query(EvaluationMark.candidate_id, func.sum(EvaluationMark.marks).label("machine_test_marks"))
+            .group_by(EvaluationMark.candidate_id)
+            .subquery()
+        )
+        query = (
+            db.query(
+                Candidate.id,
+                Candidate.name,
+                Candidate.email,
+                Candidate.test_level,
+                Candidate.is_submitted,
+                Candidate.submission_reason,
+                Candidate.test_started_at,
+                Candidate.submitted_at,
+                Candidate.interview_marks,
+                Candidate.interviewer_name,
+                Candidate.reviewer_emails,
+                func.coalesce(totals.c.machine_test_marks, 0).label("machine_test_marks"),
+                Question.id.label("question_id"),
+                Question.order_no,
+                Question.title,
+                Question.qtype,
+                Submission.answer_text,
+                Submission.updated_at,
+                EvaluationMark.marks,
+            )
+            .outerjoin(totals, totals.c.candidate_id == Candidate.id)
+            # Blank answers are skipped, as on the dashboard.
+            .outerjoin(
+                Submission,
+                (Submission.candidate_id == Candidate.id) & (func.trim(Submission.answer_text) != ""),
+            )
+            .outerjoin(Question, Question.id == Submission.question_id)
+            .outerjoin(
+                EvaluationMark,
+                (EvaluationMark.candidate_id == Candidate.id) & (EvaluationMark.question_id == Submission.question_id),
+            )
+        )
+        query = _filter_candidates(query, **filters).order_by(
+            Candidate.created_at.desc(), Candidate.id.desc(), Question.order_no
+        )
+        for row in query.yield_per(EXPORT_BATCH_SIZE):
+            yield {
+                "candidate_id": row.id,
+                "candidate_name": row.name,
+                "candidate_email": row.email,
+                "test_level": row.test_level,
+                "is_submitted": row.is_submitted,
+                "submission_reason": row.submission_reason,
+                "test_started_at": row.test_started_at,
+                "submitted_at": row.submitted_at,
+                "time_taken_seconds": _time_taken_seconds(row),
+                "interview_marks": row.interview_marks,
+                "interviewer_name": row.interviewer_name,
+                "reviewer_names": ", ".join(_reviewer_names_from_csv(row.reviewer_emails)),
+                "machine_test_marks": row.machine_test_marks,
+                "question_id": row.question_id,
+                "question_order": row.order_no,
+                "question_title": row.title,
+                "qtype": row.qtype,
+                "answer_text": row.answer_text,
+                "answer_updated_at": row.updated_at,
+                "question_marks": row.marks,
+            }
+    finally:
+        db.close()
+
+
+def _export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for index, row in enumerate(rows, start=1):
+        writer.writerow({k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()})
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _export_ndjson(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, default=lambda v: v.isoformat()))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+@router.get("/export")
+def export_submissions(
+    format: Literal["csv", "ndjson"] = "csv",
+    filters: dict = Depends(_candidate_list_filters),
+    _admin=Depends(get_current_admin),
+):
+    filename = f"submissions-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    if format == "csv":
+        body, media_type = _export_csv(_export_rows(filters)), "text/csv"
+    else:
+        body, media_type = _export_ndjson(_export_rows(filters)), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/submissions/{candidate_id}", response_model=CandidateSubmissionDetailOut)
-def get_candidate_submission_detail(
+async def get_candidate_submission_detail(
     candidate_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _admin=Depends(get_current_admin),
+    _etag=Depends(_admin_etag),
 ):
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    candidate = await db.get(Candidate, candidate_id)
     if not candidate:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
 
     questions = (
-        db.query(Question)
-        .filter(Question.level == candidate.test_level)
-        .order_by(Question.order_no.asc())
-        .all()
-    )
+        await db.scalars(
+            select(Question).where(Question.level == candidate.test_level).order_by(Question.order_no.asc())
+        )
+    ).all()
     submissions = (
-        db.query(Submission)
-        .options(joinedload(Submission.question))
-        .filter(Submission.candidate_id == candidate_id)
+        (
+            await db.scalars(
+                select(Submission)
+                .options(
+                    joinedload(Submission.question),
+                    joinedload(Submission.grading_results).joinedload(GradingResult.test_case),
+                )
+                .where(Submission.candidate_id == candidate_id)
+            )
+        )
+        .unique()
         .all()
     )
-    eval_marks = db.query(EvaluationMark).filter(EvaluationMark.candidate_id == candidate_id).all()
+    eval_marks = (await db.scalars(select(EvaluationMark).where(EvaluationMark.candidate_id == candidate_id))).all()
     submission_by_question = {s.question_id: s for s in submissions}
     marks_by_question = {m.question_id: m.marks for m in eval_marks}
 
     question_answers: list[CandidateQuestionAnswerItem] = []
+    total_suggested = None
     for q in questions:
         s = submission_by_question.get(q.id)
+        results = sorted(s.grading_results, key=lambda r: r.test_case.order_no) if s else []
+        suggested = sum(r.test_case.points for r in results if r.passed) if results else None
+        if suggested is not None:
+            total_suggested = (total_suggested or 0) + suggested
         question_answers.append(
             CandidateQuestionAnswerItem(
                 question_id=q.id,
@@ -280,19 +797,26 @@ def get_candidate_submission_detail(
                 qtype=q.qtype,
                 question_title=q.title,
                 prompt=q.prompt,
+                dataset=q.dataset,
                 answer_text=s.answer_text if s else "",
                 awarded_marks=marks_by_question.get(q.id),
+                suggested_marks=suggested,
+                test_results=[
+                    TestCaseResultItem(
+                        test_case_id=r.test_case_id,
+                        order_no=r.test_case.order_no,
+                        points=r.test_case.points,
+                        passed=r.passed,
+                        timed_out=r.timed_out,
+                        runtime_ms=r.runtime_ms,
+                        graded_at=r.graded_at,
+                    )
+                    for r in results
+                ],
                 updated_at=s.updated_at if s else None,
             )
         )
 
-    time_taken_seconds = None
-    if candidate.test_started_at and candidate.submitted_at:
-        time_taken_seconds = max(
-            0,
-            int((candidate.submitted_at - candidate.test_started_at).total_seconds()),
-        )
-
     return CandidateSubmissionDetailOut(
         candidate_id=candidate.id,
         candidate_name=candidate.name,
@@ -304,8 +828,9 @@ def get_candidate_submission_detail(
         test_duration_minutes=candidate.test_duration_minutes,
         submission_reason=candidate.submission_reason,
         submitted_at=candidate.submitted_at,
-        time_taken_seconds=time_taken_seconds,
+        time_taken_seconds=_time_taken_seconds(candidate),
         machine_test_marks=sum(marks_by_question.values()) if marks_by_question else 0,
+        suggested_marks=total_suggested,
         is_submitted=candidate.is_submitted,
         questions=question_answers,
     )
@@ -345,6 +870,7 @@ def save_candidate_marks(
             continue
         if row:
             row.marks = item.marks
+            row.source = "manual"
         else:
             db.add(EvaluationMark(candidate_id=candidate_id, question_id=item.question_id, marks=item.marks))
 
@@ -355,3 +881,69 @@ def save_candidate_marks(
         .scalar()
     )
     return {"message": "Machine test marks saved successfully", "machine_test_marks": int(total_marks or 0)}
+
+
+@router.post("/submissions/{candidate_id}/grade", response_model=GradeCandidateOut)
+def grade_candidate_submissions(
+    candidate_id: int,
+    db: Session = Depends(get_db),
+    _admin=Depends(get_current_admin),
+):
+    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    if not candidate:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
+
+    graded = grade_candidate(db, candidate_id)
+    suggested = db.execute(_suggested_marks_select().where(Submission.candidate_id == candidate_id)).first()
+    return {
+        "message": "Submissions graded successfully",
+        "graded_submissions": graded,
+        "suggested_marks": int(suggested[1]) if suggested else 0,
+    }
+
+
+@router.post(
+    "/questions/{question_id}/regrade",
+    response_model=RegradeJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def regrade_question(question_id: int, db: Session = Depends(get_db), _admin=Depends(get_current_admin)):
+    question = db.query(Question).filter(Question.id == question_id).first()
+    if not question:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
+
+    fail_stale_regrade_jobs(db)
+    active = (
+        db.query(RegradeJob)
+        .filter(RegradeJob.question_id == question_id, RegradeJob.status.in_(["queued", "running"]))
+        .first()
+    )
+    if active:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Re-grade job {active.id} is already running for this question",
+        )
+    return regrade_job_progress(start_regrade_job(db, question_id))
+
+
+@router.get("/regrade-jobs/{job_id}", response_model=RegradeJobOut)
+def get_regrade_job(job_id: int, db: Session = Depends(get_db), _admin=Depends(get_current_admin)):
+    job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Re-grade job not found")
+    return regrade_job_progress(job)
+
+
+@router.get("/execution-cache/stats", response_model=ExecutionCacheStatsOut)
+def get_execution_cache_stats(_admin=Depends(get_current_admin)):
+    return get_execution_cache().stats()
+
+
+@router.get("/auth-cache/stats", response_model=AuthCacheStatsOut)
+def get_auth_cache_stats(_admin=Depends(get_current_admin)):
+    return get_admin_cache().stats()
+
+
+@router.get("/email-outbox/stats", response_model=EmailOutboxStatsOut)
+def get_email_outbox_stats(db: Session = Depends(get_db), _admin=Depends(get_current_admin)):
+    return outbox_stats(db)
@@ -1,24 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from ..auth import create_access_token, verify_password
-from ..deps import get_db
+from ..auth import create_access_token, needs_rehash
+from ..config import settings
+from ..deps import get_current_admin, get_db, invalidate_admin
 from ..models import Admin
+from ..password_pool import PasswordPoolBusyError, get_password_pool
+from ..rate_limit import TokenBucketLimiter
 from ..schemas import AdminLogin, Token
 
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+_ip_limiter = TokenBucketLimiter(settings.login_ip_burst, settings.login_ip_per_minute)
+_email_limiter = TokenBucketLimiter(settings.login_email_burst, settings.login_email_per_minute)
+
+
+def _find_active_admin(db: Session, email: str) -> Admin | None:
+    return db.query(Admin).filter(Admin.email == email, Admin.is_active.is_(True)).first()
+
+
+def _store_password_hash(db: Session, admin_id: int, password_hash: str):
+    # A bulk UPDATE, so the admin's cached tokens (see deps) stay valid.
+    db.query(Admin).filter(Admin.id == admin_id).update({Admin.password_hash: password_hash}, synchronize_session=False)
+    db.commit()
+
 
 @router.post("/login", response_model=Token)
-def login(payload: AdminLogin, db: Session = Depends(get_db)):
-    admin = db.query(Admin).filter(Admin.email == payload.email, Admin.is_active.is_(True)).first()
-    if not admin or not verify_password(payload.password, admin.password_hash):
+async def login(payload: AdminLogin, request: Request, db: Session = Depends(get_db)):
+    client_ip = request.client.host if request.client else "unknown"
+    wait = max(_ip_limiter.acquire(client_ip), _email_limiter.acquire(payload.email.lower()))
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please retry later.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+    pool = get_password_pool()
+    admin = await run_in_threadpool(_find_active_admin, db, payload.email)
+    try:
+        verified = admin is not None and await pool.verify(payload.password, admin.password_hash)
+        if verified:
+            token = create_access_token(subject=admin.email, token_version=admin.token_version)
+        if verified and needs_rehash(admin.password_hash):
+            await run_in_threadpool(_store_password_hash, db, admin.id, await pool.hash(payload.password))
+    except PasswordPoolBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "2"},
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
         )
 
-    token = create_access_token(subject=admin.email)
     return {"access_token": token, "token_type": "bearer"}
 
+
+@router.post("/revoke")
+def revoke_tokens(admin: Admin = Depends(get_current_admin), db: Session = Depends(get_db)):
+    """Signs the current admin out everywhere by invalidating every token issued so far."""
+    db.query(Admin).filter(Admin.id == admin.id).update(
+        {Admin.token_version: Admin.token_version + 1},
+        synchronize_session=False,
+    )
+    db.commit()
+    invalidate_admin(admin.email)
+    return {"message": "All sessions revoked"}
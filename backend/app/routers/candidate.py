@@ -1,18 +1,29 @@
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..bulk import dialect_insert
 from ..config import settings
-from ..deps import get_db
-from ..email_utils import send_email
-from ..models import AppSetting, Candidate, Question, Submission
+from ..deps import get_async_db
+from ..email_templates import render_email
+from ..email_utils import queue_email, wake_email_dispatcher
+from ..grading import queue_candidate_grading
+from ..models import Candidate, Submission
+from ..question_cache import get_question_payloads
+from ..result_cache import content_key
 from ..seed import HIGH_TEST_INSTRUCTIONS
-from ..schemas import CandidateSessionOut, CandidateSubmitIn, CandidateSubmitOut
+from ..schemas import (
+    CandidateAutosaveIn,
+    CandidateAutosaveOut,
+    CandidateSessionOut,
+    CandidateSubmitIn,
+    CandidateSubmitOut,
+)
 
 
 router = APIRouter(prefix="/candidate", tags=["Candidate"])
-GEMINI_KEY_SETTING = "gemini_api_key"
 
 
 REVIEWER_EMAIL_TO_NAME = {
@@ -21,8 +32,8 @@ REVIEWER_EMAIL_TO_NAME = {
 }
 
 
-def _get_candidate_by_token(db: Session, token: str, require_not_submitted: bool = False) -> Candidate:
-    candidate = db.query(Candidate).filter(Candidate.invite_token == token).first()
+async def _get_candidate_by_token(db: AsyncSession, token: str, require_not_submitted: bool = False) -> Candidate:
+    candidate = await db.scalar(select(Candidate).where(Candidate.invite_token == token))
     if not candidate:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid invite token")
     if candidate.token_expires_at < datetime.utcnow():
@@ -42,41 +53,34 @@ def _parse_reviewer_emails(csv_value: str | None) -> list[str]:
     return cleaned
 
 
+def _answer_hash(answer_text: str) -> str:
+    return content_key(answer_text)
+
+
 @router.get("/token/{token}", response_model=CandidateSessionOut)
-def get_candidate_session(token: str, db: Session = Depends(get_db)):
-    candidate = _get_candidate_by_token(db, token, require_not_submitted=True)
+async def get_candidate_session(token: str, db: AsyncSession = Depends(get_async_db)):
+    candidate = await _get_candidate_by_token(db, token, require_not_submitted=True)
     if not candidate.test_started_at:
         candidate.test_started_at = datetime.utcnow()
-        db.commit()
-        db.refresh(candidate)
+        await db.commit()
 
     test_ends_at = candidate.test_started_at + timedelta(minutes=candidate.test_duration_minutes)
     time_left_seconds = int((test_ends_at - datetime.utcnow()).total_seconds())
     if time_left_seconds <= 0:
         candidate.is_submitted = True
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Test time is over")
 
-    questions = (
-        db.query(Question)
-        .filter(Question.level == candidate.test_level)
-        .order_by(Question.order_no.asc())
-        .all()
+    # The payloads are cached in memory; the sync loader only touches the
+    # database on a version check or a cache miss.
+    question_payload = await db.run_sync(get_question_payloads, candidate.test_level)
+    saved_answers = dict(
+        (
+            await db.execute(
+                select(Submission.question_id, Submission.answer_text).where(Submission.candidate_id == candidate.id)
+            )
+        ).all()
     )
-    key_row = db.query(AppSetting).filter(AppSetting.key == GEMINI_KEY_SETTING).first()
-    gemini_key = key_row.value if key_row and key_row.value else settings.default_gemini_api_key
-
-    question_payload = []
-    for q in questions:
-        question_payload.append(
-            {
-                "id": q.id,
-                "order_no": q.order_no,
-                "qtype": q.qtype,
-                "title": q.title,
-                "prompt": (q.prompt or "").replace("YOUR_API_KEY", gemini_key),
-            }
-        )
 
     return {
         "candidate_name": candidate.name,
@@ -88,62 +92,140 @@ def get_candidate_session(token: str, db: Session = Depends(get_db)):
         "time_left_seconds": time_left_seconds,
         "test_instructions": HIGH_TEST_INSTRUCTIONS if candidate.test_level == "high" else None,
         "questions": question_payload,
+        "saved_answers": saved_answers,
     }
 
 
+async def _normalize_answers(db: AsyncSession, candidate: Candidate, answers) -> dict[int, str]:
+    question_ids = {q["id"] for q in await db.run_sync(get_question_payloads, candidate.test_level)}
+    normalized: dict[int, str] = {}
+    for ans in answers:
+        if ans.question_id not in question_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid question_id: {ans.question_id}",
+            )
+        normalized[ans.question_id] = (ans.answer_text or "").strip()
+    return normalized
+
+
+async def _save_answers(db: AsyncSession, candidate_id: int, answers: dict[int, str]) -> int:
+    """
+    Writes the answers whose content hash differs from what is stored: one
+    SELECT, then at most one upsert and one delete. Empty answers remove the
+    stored row. Returns the number of answers written. Does not commit.
+    """
+    if not answers:
+        return 0
+    stored_hashes = dict(
+        (
+            await db.execute(
+                select(Submission.question_id, Submission.answer_hash).where(Submission.candidate_id == candidate_id)
+            )
+        ).all()
+    )
+    now = datetime.utcnow()
+    rows = []
+    cleared = []
+    for question_id, answer_text in answers.items():
+        if not answer_text:
+            if question_id in stored_hashes:
+                cleared.append(question_id)
+            continue
+        answer_hash = _answer_hash(answer_text)
+        if stored_hashes.get(question_id) == answer_hash:
+            continue
+        rows.append(
+            {
+                "candidate_id": candidate_id,
+                "question_id": question_id,
+                "answer_text": answer_text,
+                "answer_hash": answer_hash,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+
+    if rows:
+        stmt = dialect_insert(db, Submission).values(rows)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["candidate_id", "question_id"],
+                set_={
+                    "answer_text": stmt.excluded.answer_text,
+                    "answer_hash": stmt.excluded.answer_hash,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+                # A concurrent save of the same text is a no-op too.
+                where=Submission.answer_hash.is_distinct_from(stmt.excluded.answer_hash),
+            ).execution_options(track_revision=False)
+        )
+    if cleared:
+        await db.execute(
+            delete(Submission)
+            .where(Submission.candidate_id == candidate_id, Submission.question_id.in_(cleared))
+            .execution_options(synchronize_session=False, track_revision=False)
+        )
+    return len(rows) + len(cleared)
+
+
+@router.patch("/answers/{token}", response_model=CandidateAutosaveOut)
+async def autosave_answers(token: str, payload: CandidateAutosaveIn, db: AsyncSession = Depends(get_async_db)):
+    """
+    Saves the answers that changed since the last autosave. Answers whose
+    content hash matches what is stored are not written at all.
+    """
+    candidate = await _get_candidate_by_token(db, token, require_not_submitted=True)
+    if not candidate.test_started_at:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Test has not started")
+    test_ends_at = candidate.test_started_at + timedelta(minutes=candidate.test_duration_minutes)
+    if datetime.utcnow() >= test_ends_at:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Test time is over")
+
+    answers = await _normalize_answers(db, candidate, payload.answers)
+    saved = await _save_answers(db, candidate.id, answers)
+    if saved:
+        await db.commit()
+    return {"saved": saved, "unchanged": len(answers) - saved}
+
+
 @router.post("/submit/{token}", response_model=CandidateSubmitOut)
-def submit_test(token: str, payload: CandidateSubmitIn, db: Session = Depends(get_db)):
-    candidate = _get_candidate_by_token(db, token, require_not_submitted=True)
+async def submit_test(
+    token: str,
+    payload: CandidateSubmitIn,
+    db: AsyncSession = Depends(get_async_db),
+):
+    candidate = await _get_candidate_by_token(db, token, require_not_submitted=True)
     if not candidate.test_started_at:
         candidate.test_started_at = datetime.utcnow()
-        db.commit()
-        db.refresh(candidate)
+        await db.commit()
 
     test_ends_at = candidate.test_started_at + timedelta(minutes=candidate.test_duration_minutes)
     if datetime.utcnow() >= test_ends_at:
         candidate.is_submitted = True
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Test time is over")
 
-    question_ids = {
-        q.id for q in db.query(Question.id).filter(Question.level == candidate.test_level).all()
-    }
-
-    for ans in payload.answers:
-        if ans.question_id not in question_ids:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid question_id: {ans.question_id}",
+    answers = await _normalize_answers(db, candidate, payload.answers)
+    await _save_answers(db, candidate.id, answers)
+    # Only the request that flips is_submitted goes on to grade and queue
+    # emails; a concurrent double-submit gets the usual 403. The emails are
+    # committed together with the submission.
+    claimed = (
+        await db.execute(
+            update(Candidate)
+            .where(Candidate.id == candidate.id, Candidate.is_submitted.isnot(True))
+            .values(
+                submission_reason=payload.auto_submit_reason or "manual",
+                is_submitted=True,
+                submitted_at=datetime.utcnow(),
             )
-        normalized_answer = (ans.answer_text or "").strip()
-        existing = (
-            db.query(Submission)
-            .filter(
-                Submission.candidate_id == candidate.id,
-                Submission.question_id == ans.question_id,
-            )
-            .first()
+            .execution_options(synchronize_session="fetch")
         )
-        if not normalized_answer:
-            if existing:
-                db.delete(existing)
-            continue
-
-        if existing:
-            existing.answer_text = normalized_answer
-        else:
-            db.add(
-                Submission(
-                    candidate_id=candidate.id,
-                    question_id=ans.question_id,
-                    answer_text=normalized_answer,
-                )
-            )
-
-    candidate.submission_reason = payload.auto_submit_reason or "manual"
-    candidate.is_submitted = True
-    candidate.submitted_at = datetime.utcnow()
-    db.commit()
+    ).rowcount
+    if not claimed:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Test already submitted")
 
     reason_text = {
         "manual": "Manual submit",
@@ -152,65 +234,33 @@ def submit_test(token: str, payload: CandidateSubmitIn, db: Session = Depends(ge
     }.get(candidate.submission_reason or "manual", "Manual submit")
     submitted_at_str = candidate.submitted_at.strftime("%d %b %Y, %I:%M %p UTC") if candidate.submitted_at else "-"
 
-    send_email(
+    queue_email(
+        db,
         to_email=candidate.email,
-        subject="Submission Received - Machine Test",
-        body=(
-            f"Hi {candidate.name},\n\n"
-            "Your machine test submission has been received successfully.\n\n"
-            f"Submission type: {reason_text}\n"
-            f"Submitted at: {submitted_at_str}\n\n"
-            "Our team will review your responses and get back to you.\n"
-            "Thank you for your time."
-        ),
-        html_body=(
-            "<div style=\"font-family:Arial,sans-serif;background:#f4f7fb;padding:24px;color:#0f172a;\">"
-            "<div style=\"max-width:620px;margin:0 auto;background:#ffffff;border:1px solid #e2e8f0;border-radius:14px;overflow:hidden;\">"
-            "<div style=\"background:linear-gradient(135deg,#14532d,#16a34a);padding:20px 24px;color:#ffffff;\">"
-            "<h2 style=\"margin:0;font-size:22px;\">Submission Received</h2>"
-            "<p style=\"margin:8px 0 0;opacity:0.9;\">Your machine test has been submitted.</p>"
-            "</div>"
-            "<div style=\"padding:22px 24px;line-height:1.6;\">"
-            f"<p style=\"margin-top:0;\">Hi <strong>{candidate.name}</strong>,</p>"
-            "<p>Your machine test submission has been received successfully.</p>"
-            "<div style=\"background:#f8fafc;border:1px solid #e2e8f0;border-radius:10px;padding:14px 16px;\">"
-            f"<div><strong>Submission type:</strong> {reason_text}</div>"
-            f"<div><strong>Submitted at:</strong> {submitted_at_str}</div>"
-            "</div>"
-            "<p style=\"margin:16px 0 0;\">Our team will review your responses and get back to you.</p>"
-            "<p style=\"margin:8px 0 0;font-size:13px;color:#475569;\">Thank you for your time and effort.</p>"
-            "</div>"
-            "</div>"
-            "</div>"
+        **render_email(
+            "submission_received",
+            name=candidate.name,
+            reason=reason_text,
+            submitted_at=submitted_at_str,
         ),
     )
-
-    reviewer_emails = _parse_reviewer_emails(candidate.reviewer_emails)
-    for reviewer_email in reviewer_emails:
-        reviewer_name = REVIEWER_EMAIL_TO_NAME.get(reviewer_email, "REVIEWER")
-        send_email(
+    for reviewer_email in _parse_reviewer_emails(candidate.reviewer_emails):
+        queue_email(
+            db,
             to_email=reviewer_email,
-            subject=f"Candidate Submitted Test - {candidate.name}",
-            body=(
-                f"Hi {reviewer_name},\n\n"
-                f"Candidate {candidate.name} ({candidate.email}) has submitted the machine test.\n"
-                f"Test level: {candidate.test_level}\n"
-                f"Submission type: {reason_text}\n"
-                f"Submitted at: {submitted_at_str}\n\n"
-                f"Please review on admin dashboard: {settings.frontend_base_url}/admin/dashboard"
-            ),
-            html_body=(
-                "<div style=\"font-family:Arial,sans-serif;background:#f8fafc;padding:20px;color:#0f172a;\">"
-                "<div style=\"max-width:620px;margin:0 auto;background:#ffffff;border:1px solid #e2e8f0;border-radius:12px;padding:18px;\">"
-                f"<p style=\"margin:0 0 8px;\">Hi <strong>{reviewer_name}</strong>,</p>"
-                f"<p style=\"margin:0 0 10px;\">Candidate <strong>{candidate.name}</strong> ({candidate.email}) has submitted the machine test.</p>"
-                f"<p style=\"margin:0;\"><strong>Test level:</strong> {candidate.test_level}</p>"
-                f"<p style=\"margin:0;\"><strong>Submission type:</strong> {reason_text}</p>"
-                f"<p style=\"margin:0 0 12px;\"><strong>Submitted at:</strong> {submitted_at_str}</p>"
-                f"<p style=\"margin:0;\"><a href=\"{settings.frontend_base_url}/admin/dashboard\" style=\"color:#2563eb;text-decoration:none;font-weight:600;\">Open Admin Dashboard</a></p>"
-                "</div>"
-                "</div>"
+            **render_email(
+                "submission_reviewer",
+                reviewer_name=REVIEWER_EMAIL_TO_NAME.get(reviewer_email, "REVIEWER"),
+                name=candidate.name,
+                email=candidate.email,
+                test_level=candidate.test_level,
+                reason=reason_text,
+                submitted_at=submitted_at_str,
+                dashboard_link=f"{settings.frontend_base_url}/admin/dashboard",
             ),
         )
 
+    await db.commit()
+    wake_email_dispatcher()
+    queue_candidate_grading(candidate.id)
     return {"message": "Submission recorded successfully"}
@@ -1,18 +1,32 @@
-from fastapi import APIRouter, HTTPException
+import json
 
-from ..python_runner import run_python_code
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from ..execution_gate import ExecutionBusyError
+from ..python_runner import run_python_code_async, stream_python_code
 from ..schemas import PythonExecuteIn, PythonExecuteOut, SQLExecuteIn, SQLExecuteOut
-from ..sql_runner import run_sql_query
+from ..sql_runner import run_sql_query_async
 
 
 router = APIRouter(prefix="/execute", tags=["Execution"])
 
 
+def _busy(e: ExecutionBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "2"},
+    )
+
+
 @router.post("/python", response_model=PythonExecuteOut)
-def execute_python(payload: PythonExecuteIn):
+async def execute_python(payload: PythonExecuteIn):
     try:
-        result = run_python_code(payload.code, payload.stdin, timeout=5)
+        result = await run_python_code_async(payload.code, payload.stdin, timeout=5)
         return result
+    except ExecutionBusyError as e:
+        raise _busy(e)
     except SyntaxError as e:
         raise HTTPException(status_code=400, detail=f"Syntax error: {e}")
     except ValueError as e:
@@ -21,10 +35,47 @@ def execute_python(payload: PythonExecuteIn):
         raise HTTPException(status_code=500, detail=f"Python execution failed: {e}")
 
 
+@router.post("/python/stream")
+async def stream_python(payload: PythonExecuteIn):
+    events = stream_python_code(payload.code, payload.stdin, timeout=5)
+    # Pull the "start" event here so validation errors and a full queue still
+    # come back as plain HTTP errors, like /execute/python.
+    try:
+        first = await events.__anext__()
+    except ExecutionBusyError as e:
+        raise _busy(e)
+    except SyntaxError as e:
+        raise HTTPException(status_code=400, detail=f"Syntax error: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def body():
+        # If the client disconnects (or aborts to cancel), this generator is
+        # cancelled and closing `events` kills the child right away.
+        try:
+            yield _sse(first)
+            async for event in events:
+                yield _sse(event)
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
 @router.post("/sql", response_model=SQLExecuteOut)
-def execute_sql(payload: SQLExecuteIn):
+async def execute_sql(payload: SQLExecuteIn):
     try:
-        return run_sql_query(payload.query)
+        return await run_sql_query_async(payload.query, payload.dataset)
+    except ExecutionBusyError as e:
+        raise _busy(e)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
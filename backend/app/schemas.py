@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -30,6 +30,21 @@ class InviteCandidateResponse(BaseModel):
     invite_link: str
 
 
+class BulkInviteRowResult(BaseModel):
+    row: int
+    email: Optional[str] = None
+    status: Literal["invited", "invalid"]
+    candidate_id: Optional[int] = None
+    invite_link: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkInviteResponse(BaseModel):
+    invited: int
+    invalid: int
+    results: List[BulkInviteRowResult]
+
+
 class GeminiAPIKeyIn(BaseModel):
     gemini_api_key: str
 
@@ -44,6 +59,7 @@ class QuestionOut(BaseModel):
     qtype: Literal["python", "sql"]
     title: str
     prompt: str
+    dataset: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -59,6 +75,7 @@ class CandidateSessionOut(BaseModel):
     time_left_seconds: int
     test_instructions: Optional[str] = None
     questions: List[QuestionOut]
+    saved_answers: Dict[int, str] = {}
 
 
 class CandidateAnswerIn(BaseModel):
@@ -75,6 +92,15 @@ class CandidateSubmitOut(BaseModel):
     message: str
 
 
+class CandidateAutosaveIn(BaseModel):
+    answers: List[CandidateAnswerIn] = Field(default_factory=list, max_length=100)
+
+
+class CandidateAutosaveOut(BaseModel):
+    saved: int
+    unchanged: int
+
+
 class CandidateSubmissionItem(BaseModel):
     question_id: int
     question_title: str
@@ -96,18 +122,64 @@ class CandidateSubmissionGroup(BaseModel):
     submitted_at: Optional[datetime] = None
     time_taken_seconds: Optional[int] = None
     machine_test_marks: Optional[int] = None
+    suggested_marks: Optional[int] = None
     is_submitted: bool
     submissions: List[CandidateSubmissionItem]
 
 
+class CandidateSubmissionPage(BaseModel):
+    items: List[CandidateSubmissionGroup]
+    total: int
+    submitted_count: int
+    next_cursor: Optional[str] = None
+
+
+class CandidateSummaryItem(BaseModel):
+    candidate_id: int
+    candidate_name: str
+    candidate_email: EmailStr
+    test_level: str
+    interview_marks: Optional[int] = None
+    interviewer_name: Optional[str] = None
+    reviewer_names: List[str] = Field(default_factory=list)
+    test_duration_minutes: int
+    submission_reason: Optional[str] = None
+    submitted_at: Optional[datetime] = None
+    time_taken_seconds: Optional[int] = None
+    machine_test_marks: int = 0
+    suggested_marks: Optional[int] = None
+    is_submitted: bool
+    answered_count: int = 0
+
+
+class CandidateSummaryPage(BaseModel):
+    items: List[CandidateSummaryItem]
+    total: int
+    submitted_count: int
+    next_cursor: Optional[str] = None
+
+
+class TestCaseResultItem(BaseModel):
+    test_case_id: int
+    order_no: int
+    points: int
+    passed: bool
+    timed_out: bool = False
+    runtime_ms: Optional[int] = None
+    graded_at: Optional[datetime] = None
+
+
 class CandidateQuestionAnswerItem(BaseModel):
     question_id: int
     order_no: int
     qtype: str
     question_title: str
     prompt: str
+    dataset: Optional[str] = None
     answer_text: str
     awarded_marks: Optional[int] = None
+    suggested_marks: Optional[int] = None
+    test_results: List[TestCaseResultItem] = Field(default_factory=list)
     updated_at: Optional[datetime] = None
 
 
@@ -124,6 +196,7 @@ class CandidateSubmissionDetailOut(BaseModel):
     submitted_at: Optional[datetime] = None
     time_taken_seconds: Optional[int] = None
     machine_test_marks: Optional[int] = None
+    suggested_marks: Optional[int] = None
     is_submitted: bool
     questions: List[CandidateQuestionAnswerItem]
 
@@ -142,6 +215,50 @@ class SaveCandidateMarksOut(BaseModel):
     machine_test_marks: int
 
 
+class GradeCandidateOut(BaseModel):
+    message: str
+    graded_submissions: int
+    suggested_marks: int
+
+
+class RegradeJobOut(BaseModel):
+    job_id: int
+    question_id: int
+    status: Literal["queued", "running", "completed", "failed"]
+    total: int
+    processed: int
+    failed: int
+    throughput_per_second: Optional[float] = None
+    eta_seconds: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ExecutionCacheStatsOut(BaseModel):
+    entries: int
+    max_entries: int
+    hits: int
+    disk_hits: int
+    misses: int
+    hit_rate: Optional[float] = None
+
+
+class AuthCacheStatsOut(BaseModel):
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    hit_rate: Optional[float] = None
+
+
+class EmailOutboxStatsOut(BaseModel):
+    pending: int
+    sending: int
+    sent: int
+    failed: int
+
+
 class PythonExecuteIn(BaseModel):
     code: str
     stdin: str = ""
@@ -152,13 +269,16 @@ class PythonExecuteOut(BaseModel):
     stderr: str
     return_code: int
     timed_out: bool = False
+    limit_hit: Optional[Literal["wall_time", "cpu", "memory", "output", "file_size"]] = None
 
 
 class SQLExecuteIn(BaseModel):
     query: str
+    dataset: Optional[str] = None
 
 
 class SQLExecuteOut(BaseModel):
     columns: List[str]
     rows: List[List[object]]
     row_count: int
+    truncated: bool = False
@@ -1,5 +1,6 @@
 from .auth import hash_password
-from .models import Admin, AppSetting, Question, Submission
+from .models import Admin, AppSetting, GradingResult, Question, Submission, TestCase
+from .question_cache import bump_question_bank_version
 
 
 HIGH_TEST_INSTRUCTIONS = (
@@ -77,24 +78,28 @@ INTERMEDIATE_QUESTIONS = [
         "sql",
         "Department-wise Total Salary",
         (
-            "Using SQLite table employees(employee_id, employee_name, department_id, salary, age, joining_date), "
-            "write a SQL query to calculate total salary paid to employees in each department."
+            "Using SQLite tables employees(employee_id, employee_name, department_id, salary, age, joining_date, "
+            "manager_id) and departments(department_id, department_name, location), "
+            "write a SQL query to calculate total salary paid to employees in each department (by department_id)."
         ),
     ),
     (
         "sql",
         "Employees Joined in Last 6 Months",
         (
-            "Using table employees(employee_id, employee_name, department_id, salary, age, joining_date), "
-            "write a SQL query to find employees who joined in the last 6 months."
+            "Using table employees(employee_id, employee_name, department_id, salary, age, joining_date, manager_id), "
+            "write a SQL query to find employees who joined in the last 6 months. Return employee_id, "
+            "employee_name, department_id, salary, age and joining_date. The cutoff date is in "
+            "runtime_context.six_months_ago."
         ),
     ),
     (
         "sql",
         "Department-wise Highest Salary",
         (
-            "Using table employees(employee_id, employee_name, department_id, salary, age, joining_date), "
-            "write a SQL query to find department-wise highest salary."
+            "Using tables employees(employee_id, employee_name, department_id, salary, age, joining_date, "
+            "manager_id) and departments(department_id, department_name, location), "
+            "write a SQL query to find department-wise highest salary (by department_id)."
         ),
     ),
     (
@@ -322,6 +327,78 @@ QUESTION_BANKS = {
 }
 
 
+# SQL questions that run against a fixture pack instead of the five-row
+# employees table. Keyed by (level, title).
+QUESTION_DATASETS = {
+    ("intermediate", "Department-wise Total Salary"): "company",
+    ("intermediate", "Employees Joined in Last 6 Months"): "company",
+    ("intermediate", "Department-wise Highest Salary"): "company",
+}
+
+
+# Hidden test cases used for automatic grading, keyed by (level, title).
+# Each case is (kind, stdin or call expression, expected output, points); for
+# "function" cases the expected output is the repr() of the call's result.
+QUESTION_TEST_CASES = {
+    ("high", "Q1: Flatten Nested List"): [
+        ("function", "flatten_list([[1, 2, [3]], [4, 5], 6])", "[1, 2, 3, 4, 5, 6]", 1),
+        ("function", "flatten_list([])", "[]", 1),
+        ("function", "flatten_list([[[[1]]], 2, [[3, [4]]]])", "[1, 2, 3, 4]", 1),
+        ("function", "flatten_list([1, [2, [3, [4, [5, [6, [7]]]]]]])", "[1, 2, 3, 4, 5, 6, 7]", 1),
+        ("function", "flatten_list([[], [[], []], 0])", "[0]", 1),
+    ],
+    ("high", "Q3: Longest Unique Substring"): [
+        ("function", "longest_unique_substring('abcabcbb')", "3", 1),
+        ("function", "longest_unique_substring('bbbbb')", "1", 1),
+        ("function", "longest_unique_substring('pwwkew')", "3", 1),
+        ("function", "longest_unique_substring('')", "0", 1),
+        ("function", "longest_unique_substring('abcdefghijklmnopqrstuvwxyz' * 400)", "26", 1),
+    ],
+}
+
+
+# Reference queries for automatic grading of SQL answers, keyed by (level, title):
+# (query, whether row order must match, points). A candidate's result set must
+# equal the reference result set on the question's dataset.
+QUESTION_REFERENCE_QUERIES = {
+    ("intermediate", "Department-wise Total Salary"): (
+        "SELECT department_id, SUM(salary) FROM employees GROUP BY department_id",
+        False,
+        5,
+    ),
+    ("intermediate", "Employees Joined in Last 6 Months"): (
+        "SELECT employee_id, employee_name, department_id, salary, age, joining_date FROM employees "
+        "WHERE joining_date >= (SELECT six_months_ago FROM runtime_context)",
+        False,
+        5,
+    ),
+    ("intermediate", "Department-wise Highest Salary"): (
+        "SELECT department_id, MAX(salary) FROM employees GROUP BY department_id",
+        False,
+        5,
+    ),
+    ("fresher", "Filter Employees by Salary"): ("SELECT * FROM employees WHERE salary > 50000", False, 5),
+    ("fresher", "Sort Employees by Age Desc"): ("SELECT * FROM employees ORDER BY age DESC", True, 5),
+    ("fresher", "Department-wise Average Salary"): (
+        "SELECT department_id, AVG(salary) FROM employees GROUP BY department_id",
+        False,
+        5,
+    ),
+}
+
+
+def _expected_test_cases(question) -> list[tuple]:
+    key = (question.level, question.title)
+    cases = [
+        (kind, value, expected, points, False)
+        for kind, value, expected, points in QUESTION_TEST_CASES.get(key, [])
+    ]
+    if key in QUESTION_REFERENCE_QUERIES:
+        query, ordered, points = QUESTION_REFERENCE_QUERIES[key]
+        cases.append(("sql", query, "", points, ordered))
+    return cases
+
+
 def seed_admins(db, admin_string: str):
     parts = [x.strip() for x in admin_string.split(",") if x.strip()]
     for item in parts:
@@ -339,18 +416,33 @@ def seed_app_settings(db, default_gemini_api_key: str):
     exists = db.query(AppSetting).filter(AppSetting.key == key).first()
     if not exists:
         db.add(AppSetting(key=key, value=default_gemini_api_key))
+        bump_question_bank_version(db)
         db.commit()
 
 
 def seed_questions(db):
     existing_questions = db.query(Question).order_by(Question.level.asc(), Question.order_no.asc()).all()
+    # Same order as the query: levels alphabetically, then bank order.
     expected_signature = []
-    for level, qs in QUESTION_BANKS.items():
-        for qtype, title, _ in qs:
+    for level in sorted(QUESTION_BANKS):
+        for qtype, title, _ in QUESTION_BANKS[level]:
             expected_signature.append(f"{level}|{qtype}|{title}")
 
     existing_signature = [f"{q.level}|{q.qtype}|{q.title}" for q in existing_questions]
     if existing_signature == expected_signature and len(existing_questions) == len(expected_signature):
+        changed = False
+        prompts = {(level, title): prompt for level, qs in QUESTION_BANKS.items() for _, title, prompt in qs}
+        for q in existing_questions:
+            dataset = QUESTION_DATASETS.get((q.level, q.title))
+            if q.dataset != dataset:
+                q.dataset = dataset
+                changed = True
+            if q.prompt != prompts[(q.level, q.title)]:
+                q.prompt = prompts[(q.level, q.title)]
+                changed = True
+        if changed:
+            bump_question_bank_version(db)
+            db.commit()
         return
 
     # Never wipe candidate answers on startup.
@@ -360,9 +452,53 @@ def seed_questions(db):
         return
 
     db.query(Submission).delete()
+    db.query(TestCase).delete()
     db.query(Question).delete()
 
     for level, questions in QUESTION_BANKS.items():
         for i, (qtype, title, prompt) in enumerate(questions, start=1):
-            db.add(Question(level=level, order_no=i, qtype=qtype, title=title, prompt=prompt))
+            db.add(
+                Question(
+                    level=level,
+                    order_no=i,
+                    qtype=qtype,
+                    title=title,
+                    prompt=prompt,
+                    dataset=QUESTION_DATASETS.get((level, title)),
+                )
+            )
+    bump_question_bank_version(db)
+    db.commit()
+
+
+def seed_test_cases(db):
+    questions = db.query(Question).all()
+    for question in questions:
+        expected = _expected_test_cases(question)
+        existing = db.query(TestCase).filter(TestCase.question_id == question.id).order_by(TestCase.order_no).all()
+        existing_signature = [
+            (c.kind, c.stdin if c.kind == "stdio" else c.call, c.expected_output, c.points, bool(c.ordered))
+            for c in existing
+        ]
+        if existing_signature == expected:
+            continue
+
+        # Results against the old cases no longer mean anything.
+        old_ids = [c.id for c in existing]
+        if old_ids:
+            db.query(GradingResult).filter(GradingResult.test_case_id.in_(old_ids)).delete(synchronize_session=False)
+            db.query(TestCase).filter(TestCase.id.in_(old_ids)).delete(synchronize_session=False)
+        for i, (kind, value, expected_output, points, ordered) in enumerate(expected, start=1):
+            db.add(
+                TestCase(
+                    question_id=question.id,
+                    order_no=i,
+                    kind=kind,
+                    stdin=value if kind == "stdio" else "",
+                    call=None if kind == "stdio" else value,
+                    expected_output=expected_output,
+                    points=points,
+                    ordered=ordered,
+                )
+            )
     db.commit()
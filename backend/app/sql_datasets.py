@@ -0,0 +1,250 @@
+import os
+import random
+import sqlite3
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+from .config import settings
+
+
+# A fixture pack is a named, versioned SQLite dataset that SQL questions can
+# point at through Question.dataset. Packs are generated deterministically on
+# first use, written once to disk and then only ever opened read-only, so every
+# request shares the same file (and the OS page cache) without copying it.
+#
+# Bump a pack's "version" whenever its builder changes; a new file is generated
+# next to the old one, which is then deleted along with any temporary files
+# left by builds that were killed. A pack's dates run up to its
+# "as_of" day, which is also what runtime_context treats as today for it.
+
+DEFAULT_DATASET = "employees"
+
+_FIRST_NAMES = [
+    "John", "Jane", "Alice", "Bob", "Charlie", "Priya", "Rahul", "Aisha", "Wei", "Maria",
+    "Omar", "Sofia", "Arjun", "Meera", "Liam", "Emma", "Noah", "Olivia", "Ravi", "Neha",
+]
+_LAST_NAMES = [
+    "Smith", "Sharma", "Khan", "Garcia", "Chen", "Patel", "Jaiswal", "Brown", "Singh", "Lopez",
+]
+_DEPARTMENTS = [
+    "Engineering", "Sales", "Marketing", "Finance", "HR", "Support", "Operations", "Legal",
+    "Product", "Design", "Data", "Security",
+]
+_ORDER_STATUSES = ["placed", "shipped", "delivered", "cancelled", "returned"]
+_LOG_LEVELS = ["DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR"]
+_LOG_EVENTS = ["login", "logout", "view_report", "export", "update_profile", "reset_password"]
+
+
+_COMPANY_AS_OF = date(2025, 12, 31)
+
+
+def _build_company(conn: sqlite3.Connection, rng: random.Random):
+    cursor = conn.cursor()
+    cursor.executescript(
+        """
+        CREATE TABLE departments (
+            department_id INTEGER PRIMARY KEY,
+            department_name TEXT NOT NULL,
+            location TEXT NOT NULL
+        );
+        CREATE TABLE employees (
+            employee_id INTEGER PRIMARY KEY,
+            employee_name TEXT NOT NULL,
+            department_id INTEGER NOT NULL REFERENCES departments(department_id),
+            salary INTEGER NOT NULL,
+            age INTEGER NOT NULL,
+            joining_date TEXT NOT NULL,
+            manager_id INTEGER REFERENCES employees(employee_id)
+        );
+        CREATE TABLE orders (
+            order_id INTEGER PRIMARY KEY,
+            employee_id INTEGER NOT NULL REFERENCES employees(employee_id),
+            amount REAL NOT NULL,
+            status TEXT NOT NULL,
+            order_date TEXT NOT NULL
+        );
+        CREATE TABLE logs (
+            log_id INTEGER PRIMARY KEY,
+            employee_id INTEGER NOT NULL REFERENCES employees(employee_id),
+            level TEXT NOT NULL,
+            event TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+
+    locations = ["Bengaluru", "Pune", "Indore", "London", "Singapore"]
+    cursor.executemany(
+        "INSERT INTO departments(department_id, department_name, location) VALUES (?, ?, ?)",
+        [(i, name, rng.choice(locations)) for i, name in enumerate(_DEPARTMENTS, start=1)],
+    )
+
+    employee_count = 100_000
+    start = date(2018, 1, 1)
+    span_days = (_COMPANY_AS_OF - start).days
+
+    def employees():
+        for employee_id in range(1, employee_count + 1):
+            manager_id = rng.randint(1, employee_id - 1) if employee_id > 50 else None
+            yield (
+                employee_id,
+                f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+                rng.randint(1, len(_DEPARTMENTS)),
+                rng.randrange(25_000, 250_000, 500),
+                rng.randint(21, 60),
+                (start + timedelta(days=rng.randint(0, span_days))).isoformat(),
+                manager_id,
+            )
+
+    cursor.executemany(
+        """
+        INSERT INTO employees(employee_id, employee_name, department_id, salary, age, joining_date, manager_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        employees(),
+    )
+
+    def orders():
+        for order_id in range(1, 250_001):
+            yield (
+                order_id,
+                rng.randint(1, employee_count),
+                round(rng.uniform(5, 5_000), 2),
+                rng.choice(_ORDER_STATUSES),
+                (start + timedelta(days=rng.randint(0, span_days))).isoformat(),
+            )
+
+    cursor.executemany(
+        "INSERT INTO orders(order_id, employee_id, amount, status, order_date) VALUES (?, ?, ?, ?, ?)",
+        orders(),
+    )
+
+    def logs():
+        for log_id in range(1, 300_001):
+            day = start + timedelta(days=rng.randint(0, span_days))
+            yield (
+                log_id,
+                rng.randint(1, employee_count),
+                rng.choice(_LOG_LEVELS),
+                rng.choice(_LOG_EVENTS),
+                f"{day.isoformat()} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+            )
+
+    cursor.executemany(
+        "INSERT INTO logs(log_id, employee_id, level, event, created_at) VALUES (?, ?, ?, ?, ?)",
+        logs(),
+    )
+
+    cursor.executescript(
+        """
+        CREATE INDEX ix_employees_department ON employees(department_id);
+        CREATE INDEX ix_orders_employee ON orders(employee_id);
+        CREATE INDEX ix_logs_employee ON logs(employee_id);
+        """
+    )
+
+
+FIXTURE_PACKS = {
+    "company": {"version": 2, "seed": 20240101, "as_of": _COMPANY_AS_OF, "build": _build_company},
+}
+
+_build_lock = threading.Lock()
+_pack_paths: dict[str, Path] = {}
+
+
+def is_known_dataset(name: str) -> bool:
+    return name == DEFAULT_DATASET or name in FIXTURE_PACKS
+
+
+def dataset_version(name: str) -> str:
+    if name == DEFAULT_DATASET:
+        return f"{name}-builtin"
+    return f"{name}-v{FIXTURE_PACKS[name]['version']}"
+
+
+def dataset_as_of(name: str) -> date:
+    """The day a dataset's date questions are relative to."""
+    if name == DEFAULT_DATASET:
+        return date.today()
+    return FIXTURE_PACKS[name]["as_of"]
+
+
+def _build_pack(name: str, pack: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Build next to the final file and rename, so another worker process never
+    # opens a half-written pack.
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        pack["build"](conn, random.Random(pack["seed"]))
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+def _build_running(pid: int) -> bool:
+    # This process only builds under _build_lock, so its own leftovers are dead.
+    if pid == os.getpid():
+        return False
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _remove_stale_files(name: str, path: Path):
+    for stale in path.parent.glob(f"{name}-v*"):
+        if stale == path:
+            continue
+        if stale.suffix == ".tmp":
+            # <name>-v<version>.<pid>.tmp from _build_pack.
+            pid = stale.suffixes[-2][1:] if len(stale.suffixes) > 1 else ""
+            if pid.isdigit() and _build_running(int(pid)):
+                continue
+        elif stale.suffix != ".sqlite":
+            continue
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+
+def _pack_path(name: str) -> Path:
+    path = _pack_paths.get(name)
+    if path is not None:
+        return path
+    pack = FIXTURE_PACKS[name]
+    with _build_lock:
+        path = _pack_paths.get(name)
+        if path is None:
+            path = Path(settings.sql_fixture_dir).resolve() / f"{name}-v{pack['version']}.sqlite"
+            if not path.exists():
+                _build_pack(name, pack, path)
+            _remove_stale_files(name, path)
+            _pack_paths[name] = path
+    return path
+
+
+def open_pack(name: str) -> sqlite3.Connection:
+    path = _pack_path(name)
+    conn = sqlite3.connect(f"{path.as_uri()}?mode=ro&immutable=1", uri=True)
+    # Map the file instead of copying pages into a private cache.
+    conn.execute(f"PRAGMA mmap_size = {256 * 1024 * 1024}")
+    return conn
+
+
+def warm_packs():
+    for name in FIXTURE_PACKS:
+        _pack_path(name)
@@ -1,6 +1,16 @@
+import hashlib
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import date, timedelta
 
+from .config import settings
+from .execution_gate import get_gate
+from .result_cache import content_key, get_execution_cache
+from .sql_datasets import DEFAULT_DATASET, dataset_as_of, dataset_version, is_known_dataset, open_pack
+
 
 EMPLOYEES = [
     (1, "John", 1, 50000, 25, "2023-01-10"),
@@ -11,22 +21,30 @@ EMPLOYEES = [
 ]
 
 
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BLOCKED_KEYWORDS = re.compile(r"\b(?:insert|update|delete|drop|alter|create|attach|detach|pragma)\b")
+
+
 def _is_safe_select(query: str) -> bool:
     q = query.strip().lower()
     if not q:
         return False
     if ";" in q[:-1]:
         return False
-    blocked = ["insert", "update", "delete", "drop", "alter", "create", "attach", "detach", "pragma"]
-    if any(word in q for word in blocked):
+    # Whole keywords only, outside string literals: created_at or
+    # 'update_profile' are fine, an UPDATE statement is not.
+    if _BLOCKED_KEYWORDS.search(_STRING_LITERAL.sub("''", q)):
         return False
     return q.startswith("select") or q.startswith("with")
 
 
-def run_sql_query(query: str):
-    if not _is_safe_select(query):
-        raise ValueError("Only SELECT/WITH read-only SQL queries are allowed.")
+_template_lock = threading.Lock()
+# (build date, serialized database image). Rebuilt only when the date rolls
+# over, since runtime_context.six_months_ago depends on it.
+_template: tuple[date, bytes] | None = None
 
+
+def _build_template(today: date) -> bytes:
     conn = sqlite3.connect(":memory:")
     try:
         cursor = conn.cursor()
@@ -51,14 +69,156 @@ def run_sql_query(query: str):
         )
 
         # Helpful runtime constant for "last 6 months" style queries.
-        six_months_ago = (date.today() - timedelta(days=180)).isoformat()
-        cursor.execute("CREATE TEMP TABLE runtime_context (six_months_ago TEXT)")
+        six_months_ago = (today - timedelta(days=180)).isoformat()
+        cursor.execute("CREATE TABLE runtime_context (six_months_ago TEXT)")
         cursor.execute("INSERT INTO runtime_context(six_months_ago) VALUES (?)", (six_months_ago,))
+        conn.commit()
+        return conn.serialize()
+    finally:
+        conn.close()
 
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        columns = [col[0] for col in cursor.description] if cursor.description else []
-        return {"columns": columns, "rows": [list(r) for r in rows], "row_count": len(rows)}
+
+def _template_image() -> bytes:
+    global _template
+    today = date.today()
+    current = _template
+    if current is not None and current[0] == today:
+        return current[1]
+    with _template_lock:
+        if _template is None or _template[0] != today:
+            _template = (today, _build_template(today))
+        return _template[1]
+
+
+def _open_dataset(dataset: str) -> sqlite3.Connection:
+    if dataset == DEFAULT_DATASET:
+        conn = sqlite3.connect(":memory:")
+        # Cloning the prebuilt image is a memcpy; no DDL or inserts per query.
+        conn.deserialize(_template_image())
+    else:
+        conn = open_pack(dataset)
+        # Packs are immutable on disk; the constant lives in the connection's
+        # private temp schema instead, relative to the pack's own "today".
+        six_months_ago = (dataset_as_of(dataset) - timedelta(days=180)).isoformat()
+        conn.execute("CREATE TEMP TABLE runtime_context (six_months_ago TEXT)")
+        conn.execute("INSERT INTO runtime_context(six_months_ago) VALUES (?)", (six_months_ago,))
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def _check_query(query: str, dataset: str):
+    if not _is_safe_select(query):
+        raise ValueError("Only SELECT/WITH read-only SQL queries are allowed.")
+    if not is_known_dataset(dataset):
+        raise ValueError(f"Unknown SQL dataset: {dataset}")
+
+
+@contextmanager
+def _executed_cursor(query: str, dataset: str, timeout: int):
+    conn = _open_dataset(dataset)
+    deadline = time.monotonic() + timeout
+    # Large packs make runaway joins possible; abort them like a Python timeout.
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, 10_000)
+    try:
+        try:
+            cursor = conn.execute(query)
+            yield cursor
+        except sqlite3.OperationalError as exc:
+            if time.monotonic() > deadline:
+                raise ValueError(f"Query timed out after {timeout} seconds.") from exc
+            raise
     finally:
         conn.close()
 
+
+def _cache_key(query: str, dataset: str) -> str:
+    # The date is part of the dataset version: runtime_context changes daily.
+    return content_key(
+        "sql",
+        dataset_version(dataset),
+        date.today().isoformat(),
+        str(settings.sql_max_result_rows),
+        normalize_sql_text(query),
+    )
+
+
+def run_sql_query(query: str, dataset: str | None = None, timeout: int = 5):
+    dataset = dataset or DEFAULT_DATASET
+    _check_query(query, dataset)
+
+    key = _cache_key(query, dataset)
+    cached = get_execution_cache().get(key)
+    if cached is not None:
+        return cached
+
+    with _executed_cursor(query, dataset, timeout) as cursor:
+        rows = cursor.fetchmany(settings.sql_max_result_rows + 1)
+        truncated = len(rows) > settings.sql_max_result_rows
+        rows = rows[: settings.sql_max_result_rows]
+        columns = [col[0] for col in cursor.description] if cursor.description else []
+        result = {"columns": columns, "rows": [list(r) for r in rows], "row_count": len(rows), "truncated": truncated}
+    get_execution_cache().set(key, result)
+    return result
+
+
+def normalize_sql_text(query: str) -> str:
+    # Whitespace outside string literals is insignificant; a trailing ";" too.
+    parts = re.split(r"('(?:[^']|'')*')", query.strip().rstrip(";").strip())
+    return "".join(part if i % 2 else " ".join(part.split()) for i, part in enumerate(parts))
+
+
+_MULTISET_MODULUS = 1 << 128
+
+
+def _canonical_value(value):
+    if isinstance(value, float):
+        # AVG()/division results differ in the last bits between equivalent queries.
+        value = round(value, 6)
+        if value.is_integer():
+            return int(value)
+    return value
+
+
+def _row_digest(row) -> int:
+    encoded = repr(tuple(_canonical_value(v) for v in row)).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=16).digest(), "big")
+
+
+def fingerprint_sql_query(query: str, dataset: str | None = None, ordered: bool = False, timeout: int = 5) -> dict:
+    """
+    Reduce a query's full result set to a fixed-size fingerprint in one pass,
+    without holding the rows in memory. Unordered results use an additive
+    multiset hash, so row order does not matter but duplicates do.
+    """
+    dataset = dataset or DEFAULT_DATASET
+    _check_query(query, dataset)
+
+    with _executed_cursor(query, dataset, timeout) as cursor:
+        column_count = len(cursor.description or [])
+        row_count = 0
+        if ordered:
+            running = hashlib.blake2b(digest_size=16)
+            for row in cursor:
+                running.update(_row_digest(row).to_bytes(16, "big"))
+                row_count += 1
+            digest = running.hexdigest()
+        else:
+            total = 0
+            for row in cursor:
+                total = (total + _row_digest(row)) % _MULTISET_MODULUS
+                row_count += 1
+            digest = f"{total:032x}"
+    return {"column_count": column_count, "row_count": row_count, "digest": digest}
+
+
+async def run_sql_query_async(query: str, dataset: str | None = None):
+    dataset = dataset or DEFAULT_DATASET
+    _check_query(query, dataset)
+
+    cached = get_execution_cache().get(_cache_key(query, dataset))
+    if cached is not None:
+        return cached
+
+    gate = get_gate(settings.execution_max_concurrency, settings.execution_max_queue)
+    async with gate.slot():
+        return await gate.run_blocking(run_sql_query, query, dataset)
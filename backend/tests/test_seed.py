@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from app.models import Candidate, Question, Submission
+from app.seed import QUESTION_DATASETS, seed_questions
+
+
+def test_upgrade_with_submissions_sets_datasets(db):
+    seed_questions(db)
+    # A database seeded before questions had datasets, with answers on record.
+    db.query(Question).update({Question.dataset: None})
+    candidate = Candidate(name="A", email="a@example.com", invite_token="t", token_expires_at=datetime(2099, 1, 1))
+    db.add(candidate)
+    db.flush()
+    question_ids = [q.id for q in db.query(Question).order_by(Question.id)]
+    db.add(Submission(candidate_id=candidate.id, question_id=question_ids[0], answer_text="x"))
+    db.commit()
+
+    seed_questions(db)
+
+    assert [q.id for q in db.query(Question).order_by(Question.id)] == question_ids
+    for (level, title), dataset in QUESTION_DATASETS.items():
+        question = db.query(Question).filter(Question.level == level, Question.title == title).one()
+        assert question.dataset == dataset == "company"
+    assert db.query(Submission).count() == 1
+
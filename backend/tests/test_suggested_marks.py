@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from app import models
+from app.models import Candidate, GradingResult, Question, Submission
+from app.routers.admin import _suggested_marks_select
+
+
+def _candidate(db, token: str) -> Candidate:
+    candidate = Candidate(
+        name=token, email=f"{token}@example.com", invite_token=token, token_expires_at=datetime(2099, 1, 1)
+    )
+    db.add(candidate)
+    db.flush()
+    return candidate
+
+
+def test_graded_candidate_who_passed_nothing_scores_zero(db):
+    question = Question(level="intermediate", order_no=1, qtype="python", title="Q", prompt="p")
+    db.add(question)
+    db.flush()
+    case_a = models.TestCase(question_id=question.id, order_no=1, expected_output="1", points=3)
+    case_b = models.TestCase(question_id=question.id, order_no=2, expected_output="2", points=2)
+    db.add_all([case_a, case_b])
+    db.flush()
+
+    failed, passed, ungraded = _candidate(db, "failed"), _candidate(db, "passed"), _candidate(db, "ungraded")
+    for candidate, outcomes in ((failed, [False, False]), (passed, [True, False]), (ungraded, [])):
+        submission = Submission(candidate_id=candidate.id, question_id=question.id, answer_text="x")
+        db.add(submission)
+        db.flush()
+        for test_case, ok in zip((case_a, case_b), outcomes):
+            db.add(GradingResult(submission_id=submission.id, test_case_id=test_case.id, passed=ok))
+    db.commit()
+
+    suggested = dict(db.execute(_suggested_marks_select()).all())
+
+    assert suggested.get(failed.id) == 0
+    assert suggested.get(passed.id) == 3
+    assert ungraded.id not in suggested
@@ -21,3 +21,38 @@ if (existing) {
   setAuthToken(existing);
 }
 
+
+// Runs Python through the streaming endpoint, calling onEvent for every
+// server-sent event ("start", "stdout", "stderr", "exit"). Aborting `signal`
+// closes the connection, which stops the run on the server.
+export async function streamPython(body, onEvent, signal) {
+  const response = await fetch(`${API_BASE}/execute/python/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+    signal,
+  });
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}));
+    throw new Error(data.detail || "Execution failed");
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) return;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const dataLine = buffer
+        .slice(0, boundary)
+        .split("\n")
+        .find((line) => line.startsWith("data: "));
+      if (dataLine) onEvent(JSON.parse(dataLine.slice(6)));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+}
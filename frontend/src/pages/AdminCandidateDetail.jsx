@@ -128,9 +128,10 @@ export default function AdminCandidateDetail() {
 
   async function runSQL(questionId) {
     const query = runInputs[questionId] || "";
+    const dataset = data?.questions?.find((q) => q.question_id === questionId)?.dataset || null;
     setExecution((prev) => ({ ...prev, [questionId]: { loading: true, mode: "sql" } }));
     try {
-      const { data } = await api.post("/execute/sql", { query });
+      const { data } = await api.post("/execute/sql", { query, dataset });
       setExecution((prev) => ({ ...prev, [questionId]: { loading: false, mode: "sql", ...data, stderr: "" } }));
     } catch (err) {
       setExecution((prev) => ({
@@ -177,6 +178,9 @@ export default function AdminCandidateDetail() {
               <p className="text-sm text-slate-600">
                 Machine Test Marks: {data.machine_test_marks ?? totalMachineTestMarks}
               </p>
+              <p className="text-sm text-slate-600">
+                Suggested Marks (auto-graded): {data.suggested_marks ?? "-"}
+              </p>
               <p className="text-sm text-slate-600">
                 Submit Type: {submissionReasonText(data.submission_reason)}
               </p>
@@ -208,6 +212,12 @@ export default function AdminCandidateDetail() {
                     onChange={(e) => updateMark(q.question_id, e.target.value)}
                     className="w-24 rounded-lg border border-slate-300 px-2 py-1 text-sm outline-none focus:border-brand-500"
                   />
+                  {q.suggested_marks !== null && q.suggested_marks !== undefined && (
+                    <span className="rounded-full bg-emerald-100 px-3 py-1 text-xs font-semibold text-emerald-700">
+                      Suggested: {q.suggested_marks} ({q.test_results.filter((r) => r.passed).length}/
+                      {q.test_results.length} tests passed)
+                    </span>
+                  )}
                 </div>
 
                 <div className="mt-4 rounded-lg border border-slate-200 p-3">
@@ -261,7 +271,10 @@ export default function AdminCandidateDetail() {
                         </>
                       ) : (
                         <>
-                          <p className="font-semibold">Rows: {execution[q.question_id].row_count}</p>
+                          <p className="font-semibold">
+                            Rows: {execution[q.question_id].row_count}
+                            {execution[q.question_id].truncated ? " (showing first rows only)" : ""}
+                          </p>
                           {execution[q.question_id].columns?.length > 0 ? (
                             <div className="mt-2 overflow-auto">
                               <table className="min-w-full text-left text-xs">
@@ -2,10 +2,8 @@ import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { api, setAuthToken } from "../api";
 
-const REVIEWER_OPTIONS = [
-  { name: "HARSH JAISWAL", email: "harshjaiswal.linuxban@gmail.com" },
-  { name: "RAHUL", email: "rahulparihar.stevesai@gmail.com" },
-];
+const PAGE_SIZE = 25;
+const EMPTY_FILTERS = { level: "", submitted: "", reviewer: "", date_from: "", date_to: "", sort: "newest" };
 
 export default function AdminDashboard() {
   const [invite, setInvite] = useState({
@@ -19,21 +17,36 @@ export default function AdminDashboard() {
   });
   const [inviteResult, setInviteResult] = useState("");
   const [submissions, setSubmissions] = useState([]);
+  const [filters, setFilters] = useState(EMPTY_FILTERS);
+  // Cursor used to fetch each visited page; the last one is the current page.
+  const [pageCursors, setPageCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totals, setTotals] = useState({ total: 0, submitted: 0 });
   const [loading, setLoading] = useState(false);
   const [inviteLoading, setInviteLoading] = useState(false);
   const [inviteNotice, setInviteNotice] = useState(null);
+  const [bulkLoading, setBulkLoading] = useState(false);
+  const [bulkReport, setBulkReport] = useState(null);
   const [error, setError] = useState("");
   const [deletingId, setDeletingId] = useState(null);
   const [geminiKey, setGeminiKey] = useState("");
   const [geminiLoading, setGeminiLoading] = useState(false);
+  const [reviewerOptions, setReviewerOptions] = useState([]);
   const navigate = useNavigate();
 
-  async function loadSubmissions() {
+  async function loadSubmissions(cursor = pageCursors[pageCursors.length - 1]) {
     setLoading(true);
     setError("");
     try {
-      const { data } = await api.get("/admin/submissions");
-      setSubmissions(data);
+      const params = { limit: PAGE_SIZE };
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== "") params[key] = value;
+      });
+      if (cursor) params.cursor = cursor;
+      const { data } = await api.get("/admin/submissions/summary", { params });
+      setSubmissions(data.items);
+      setNextCursor(data.next_cursor);
+      setTotals({ total: data.total, submitted: data.submitted_count });
     } catch (err) {
       const detail = err?.response?.data?.detail;
       if (detail === "Invalid token" || detail === "Admin not found") {
@@ -48,10 +61,50 @@ export default function AdminDashboard() {
   }
 
   useEffect(() => {
-    loadSubmissions();
     loadGeminiKey();
+    loadReviewerOptions();
   }, []);
 
+  useEffect(() => {
+    setPageCursors([null]);
+    loadSubmissions(null);
+  }, [filters]);
+
+  async function exportSubmissions() {
+    const params = { format: "csv" };
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value !== "" && key !== "sort") params[key] = value;
+    });
+    try {
+      const { data } = await api.get("/admin/export", { params, responseType: "blob" });
+      const url = URL.createObjectURL(data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = "submissions.csv";
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      setError(err?.response?.data?.detail || "Failed to export submissions");
+    }
+  }
+
+  function updateFilter(key, value) {
+    setFilters((prev) => ({ ...prev, [key]: value }));
+  }
+
+  function nextPage() {
+    if (!nextCursor) return;
+    setPageCursors((prev) => [...prev, nextCursor]);
+    loadSubmissions(nextCursor);
+  }
+
+  function previousPage() {
+    if (pageCursors.length < 2) return;
+    const previous = pageCursors.slice(0, -1);
+    setPageCursors(previous);
+    loadSubmissions(previous[previous.length - 1]);
+  }
+
   useEffect(() => {
     if (!inviteNotice) return;
     const timer = setTimeout(() => setInviteNotice(null), 4000);
@@ -71,6 +124,15 @@ export default function AdminDashboard() {
     }
   }
 
+  async function loadReviewerOptions() {
+    try {
+      const { data } = await api.get("/admin/reviewer-options");
+      setReviewerOptions(data);
+    } catch (err) {
+      setError(err?.response?.data?.detail || "Failed to load reviewers");
+    }
+  }
+
   function toggleReviewer(email) {
     setInvite((prev) => {
       const has = prev.reviewer_emails.includes(email);
@@ -122,6 +184,32 @@ export default function AdminDashboard() {
     }
   }
 
+  async function sendBulkInvite(e) {
+    const file = e.target.files?.[0];
+    e.target.value = "";
+    if (!file) return;
+    setBulkReport(null);
+    setInviteNotice(null);
+    setBulkLoading(true);
+    try {
+      const form = new FormData();
+      form.append("file", file);
+      const { data } = await api.post("/admin/invite/bulk", form);
+      setBulkReport(data);
+      await loadSubmissions();
+      setInviteNotice({
+        type: data.invalid ? "error" : "success",
+        title: "Bulk Invite",
+        message: `${data.invited} invited, ${data.invalid} rejected.`,
+      });
+    } catch (err) {
+      const msg = err?.response?.data?.detail || "Bulk invite failed";
+      setInviteNotice({ type: "error", title: "Bulk Invite Failed", message: msg });
+    } finally {
+      setBulkLoading(false);
+    }
+  }
+
   function logout() {
     setAuthToken(null);
     navigate("/admin/login");
@@ -161,8 +249,8 @@ export default function AdminDashboard() {
     }
   }
 
-  const totalCandidates = submissions.length;
-  const submittedCount = submissions.filter((x) => x.is_submitted).length;
+  const totalCandidates = totals.total;
+  const submittedCount = totals.submitted;
   const pendingCount = totalCandidates - submittedCount;
 
   function levelBadgeClass(level) {
@@ -361,7 +449,7 @@ export default function AdminDashboard() {
                     Reviewer Notifications
                   </p>
                   <div className="space-y-2 rounded-xl border border-slate-200 bg-slate-50 p-3">
-                    {REVIEWER_OPTIONS.map((item) => (
+                    {reviewerOptions.map((item) => (
                       <label key={item.email} className="flex cursor-pointer items-center gap-2 text-sm text-slate-700">
                         <input
                           type="checkbox"
@@ -396,20 +484,108 @@ export default function AdminDashboard() {
                 </div>
               )}
               {error && <p className="mt-3 text-sm text-red-600">{error}</p>}
+              <div className="mt-5 border-t border-slate-200 pt-4">
+                <p className="text-xs font-semibold uppercase tracking-wide text-slate-500">Bulk Invite</p>
+                <p className="mt-1 text-xs text-slate-500">
+                  CSV with columns name, email, test_level, test_duration_minutes, reviewer_emails (";"-separated), or a JSON list.
+                </p>
+                <label className="mt-2 inline-block cursor-pointer rounded-lg border border-slate-300 px-3 py-1.5 text-xs font-semibold text-slate-700 hover:border-brand-400">
+                  {bulkLoading ? "Uploading..." : "Upload CSV / JSON"}
+                  <input
+                    type="file"
+                    accept=".csv,.json,text/csv,application/json"
+                    onChange={sendBulkInvite}
+                    disabled={bulkLoading}
+                    className="hidden"
+                  />
+                </label>
+                {bulkReport && bulkReport.invalid > 0 && (
+                  <ul className="mt-2 max-h-40 space-y-1 overflow-y-auto text-xs text-red-600">
+                    {bulkReport.results
+                      .filter((item) => item.status === "invalid")
+                      .map((item) => (
+                        <li key={item.row}>
+                          Row {item.row}
+                          {item.email ? ` (${item.email})` : ""}: {item.error}
+                        </li>
+                      ))}
+                  </ul>
+                )}
+              </div>
             </div>
           </div>
 
           <div className="lg:col-span-2 rounded-3xl border border-slate-200 bg-white p-5 shadow-sm">
-            <h2 className="text-xl font-semibold text-slate-900">Candidate Submissions</h2>
+            <div className="flex flex-wrap items-center justify-between gap-3">
+              <h2 className="text-xl font-semibold text-slate-900">Candidate Submissions</h2>
+              <button
+                type="button"
+                onClick={exportSubmissions}
+                className="rounded-lg border border-slate-300 px-3 py-1.5 text-xs font-semibold text-slate-700 hover:border-brand-400"
+              >
+                Export CSV
+              </button>
+            </div>
             <p className="mt-1 text-xs text-slate-500">Click any candidate card to inspect full answers and execution.</p>
+            <div className="mt-4 grid gap-2 sm:grid-cols-3">
+              <select
+                value={filters.level}
+                onChange={(e) => updateFilter("level", e.target.value)}
+                className="rounded-xl border border-slate-300 bg-slate-50 px-3 py-2 text-sm"
+              >
+                <option value="">All levels</option>
+                <option value="fresher">Fresher</option>
+                <option value="intermediate">Intermediate</option>
+                <option value="high">High</option>
+              </select>
+              <select
+                value={filters.submitted}
+                onChange={(e) => updateFilter("submitted", e.target.value)}
+                className="rounded-xl border border-slate-300 bg-slate-50 px-3 py-2 text-sm"
+              >
+                <option value="">All statuses</option>
+                <option value="true">Submitted</option>
+                <option value="false">Pending</option>
+              </select>
+              <select
+                value={filters.reviewer}
+                onChange={(e) => updateFilter("reviewer", e.target.value)}
+                className="rounded-xl border border-slate-300 bg-slate-50 px-3 py-2 text-sm"
+              >
+                <option value="">All reviewers</option>
+                {reviewerOptions.map((item) => (
+                  <option key={item.email} value={item.email}>
+                    {item.name}
+                  </option>
+                ))}
+              </select>
+              <input
+                type="date"
+                value={filters.date_from}
+                onChange={(e) => updateFilter("date_from", e.target.value)}
+                className="rounded-xl border border-slate-300 bg-slate-50 px-3 py-2 text-sm"
+              />
+              <input
+                type="date"
+                value={filters.date_to}
+                onChange={(e) => updateFilter("date_to", e.target.value)}
+                className="rounded-xl border border-slate-300 bg-slate-50 px-3 py-2 text-sm"
+              />
+              <select
+                value={filters.sort}
+                onChange={(e) => updateFilter("sort", e.target.value)}
+                className="rounded-xl border border-slate-300 bg-slate-50 px-3 py-2 text-sm"
+              >
+                <option value="newest">Newest first</option>
+                <option value="oldest">Oldest first</option>
+              </select>
+            </div>
             {loading ? (
               <p className="mt-4 text-slate-600">Loading...</p>
             ) : (
               <div className="mt-4 space-y-4">
                 {submissions.map((item) => {
-                  const answeredCount = (item.submissions || []).filter(
-                    (s) => (s.answer_text || "").trim().length > 0
-                  ).length;
+                  const answeredCount = item.answered_count ?? 0;
                   return (
                     <div
                       key={item.candidate_id}
@@ -443,6 +619,11 @@ export default function AdminDashboard() {
                             <span className="rounded-full bg-emerald-100 px-3 py-1 text-xs font-semibold text-emerald-700">
                               Machine Test Marks: {item.machine_test_marks ?? 0}
                             </span>
+                            {item.suggested_marks !== null && item.suggested_marks !== undefined && (
+                              <span className="rounded-full bg-teal-100 px-3 py-1 text-xs font-semibold text-teal-700">
+                                Suggested Marks: {item.suggested_marks}
+                              </span>
+                            )}
                             {item.reviewer_names?.length > 0 && (
                               <span className="rounded-full bg-purple-100 px-3 py-1 text-xs font-semibold text-purple-700">
                                 Reviewers: {item.reviewer_names.join(", ")}
@@ -479,6 +660,27 @@ export default function AdminDashboard() {
                     No candidates invited yet.
                   </div>
                 )}
+                {(pageCursors.length > 1 || nextCursor) && (
+                  <div className="flex items-center justify-between gap-3">
+                    <button
+                      type="button"
+                      disabled={pageCursors.length < 2}
+                      onClick={previousPage}
+                      className="rounded-lg border border-slate-300 px-3 py-1.5 text-sm text-slate-700 hover:border-brand-400 disabled:opacity-50"
+                    >
+                      Previous
+                    </button>
+                    <span className="text-xs text-slate-500">Page {pageCursors.length}</span>
+                    <button
+                      type="button"
+                      disabled={!nextCursor}
+                      onClick={nextPage}
+                      className="rounded-lg border border-slate-300 px-3 py-1.5 text-sm text-slate-700 hover:border-brand-400 disabled:opacity-50"
+                    >
+                      Next
+                    </button>
+                  </div>
+                )}
               </div>
             )}
           </div>
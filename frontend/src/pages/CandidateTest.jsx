@@ -1,7 +1,7 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import Editor from "@monaco-editor/react";
-import { api } from "../api";
+import { api, streamPython } from "../api";
 
 const EMPLOYEE_COLUMNS = [
   "employee_id",
@@ -20,7 +20,18 @@ const EMPLOYEE_ROWS = [
   [4, "Bob", 1, 45000, 22, "2024-01-20"],
   [5, "Charlie", 3, 70000, 35, "2021-09-25"],
 ];
+// Schemas of the fixture packs some SQL questions run against (question.dataset).
+const DATASET_TABLES = {
+  company: [
+    ["departments", ["department_id", "department_name", "location"]],
+    ["employees", [...EMPLOYEE_COLUMNS, "manager_id"]],
+    ["orders", ["order_id", "employee_id", "amount", "status", "order_date"]],
+    ["logs", ["log_id", "employee_id", "level", "event", "created_at"]],
+    ["runtime_context", ["six_months_ago"]],
+  ],
+};
 const MAX_WARNINGS = 3;
+const AUTOSAVE_DELAY_MS = 1500;
 
 export default function CandidateTest() {
   const { token } = useParams();
@@ -41,6 +52,9 @@ export default function CandidateTest() {
   const answersRef = useRef({});
   const questionListRef = useRef([]);
   const autoSubmitTriggeredRef = useRef(false);
+  const runControllersRef = useRef({});
+  const savedAnswersRef = useRef({});
+  const autosaveTimerRef = useRef(null);
 
   useEffect(() => {
     async function loadSession() {
@@ -52,10 +66,12 @@ export default function CandidateTest() {
       try {
         const { data } = await api.get(`/candidate/token/${token}`);
         setSession(data);
+        const saved = data.saved_answers || {};
         const initial = {};
         data.questions.forEach((q) => {
-          initial[q.id] = "";
+          initial[q.id] = saved[q.id] || "";
         });
+        savedAnswersRef.current = { ...initial };
         setAnswers(initial);
         setRemainingSeconds(Math.max(0, Number(data.time_left_seconds || 0)));
       } catch (err) {
@@ -95,6 +111,37 @@ export default function CandidateTest() {
     questionListRef.current = questionList;
   }, [questionList]);
 
+  // Debounced autosave: only answers that differ from the last saved copy are sent.
+  useEffect(() => {
+    if (!testStarted || submitting) return undefined;
+    clearTimeout(autosaveTimerRef.current);
+    autosaveTimerRef.current = setTimeout(autosaveAnswers, AUTOSAVE_DELAY_MS);
+    return () => clearTimeout(autosaveTimerRef.current);
+  }, [answers, testStarted, submitting]);
+
+  async function autosaveAnswers() {
+    const current = answersRef.current;
+    const changed = Object.keys(current).filter(
+      (questionId) => (current[questionId] || "").trim() !== (savedAnswersRef.current[questionId] || "").trim()
+    );
+    if (changed.length === 0) return;
+    const snapshot = {};
+    changed.forEach((questionId) => {
+      snapshot[questionId] = current[questionId] || "";
+    });
+    try {
+      await api.patch(`/candidate/answers/${token}`, {
+        answers: changed.map((questionId) => ({
+          question_id: Number(questionId),
+          answer_text: snapshot[questionId],
+        })),
+      });
+      savedAnswersRef.current = { ...savedAnswersRef.current, ...snapshot };
+    } catch {
+      // The next edit (or the final submit) sends these answers again.
+    }
+  }
+
   useEffect(() => {
     if (!testStarted) return;
     const timer = setInterval(() => {
@@ -194,8 +241,9 @@ export default function CandidateTest() {
   }
 
   async function runPython(questionId) {
+    // Served by the warm pool, and from the result cache for unchanged code.
     const code = answers[questionId] || "";
-    setExecution((prev) => ({ ...prev, [questionId]: { loading: true } }));
+    setExecution((prev) => ({ ...prev, [questionId]: { loading: true, stdout: "", stderr: "" } }));
     try {
       const { data } = await api.post("/execute/python", { code, stdin: "" });
       setExecution((prev) => ({ ...prev, [questionId]: { loading: false, ...data } }));
@@ -204,8 +252,8 @@ export default function CandidateTest() {
         ...prev,
         [questionId]: {
           loading: false,
-          stderr: err?.response?.data?.detail || "Execution failed",
           stdout: "",
+          stderr: err?.response?.data?.detail || "Execution failed",
           return_code: -1,
           timed_out: false,
         },
@@ -213,11 +261,57 @@ export default function CandidateTest() {
     }
   }
 
+  async function runPythonLive(questionId) {
+    // Opt-in for long runs: output arrives as it is printed and can be cancelled.
+    const code = answers[questionId] || "";
+    const controller = new AbortController();
+    runControllersRef.current[questionId] = controller;
+    setExecution((prev) => ({ ...prev, [questionId]: { loading: true, live: true, stdout: "", stderr: "" } }));
+    const update = (patch) =>
+      setExecution((prev) => {
+        const current = prev[questionId] || {};
+        return { ...prev, [questionId]: { ...current, ...patch(current) } };
+      });
+    try {
+      await streamPython(
+        { code, stdin: "" },
+        (event) => {
+          if (event.type === "stdout" || event.type === "stderr") {
+            update((current) => ({ [event.type]: (current[event.type] || "") + event.data }));
+          } else if (event.type === "exit") {
+            update(() => ({
+              loading: false,
+              return_code: event.return_code,
+              timed_out: event.timed_out,
+              limit_hit: event.limit_hit,
+            }));
+          }
+        },
+        controller.signal
+      );
+    } catch (err) {
+      const cancelled = err?.name === "AbortError";
+      update((current) => ({
+        loading: false,
+        stderr: cancelled ? `${current.stderr || ""}Run cancelled.\n` : err?.message || "Execution failed",
+        return_code: -1,
+        timed_out: false,
+      }));
+    } finally {
+      delete runControllersRef.current[questionId];
+    }
+  }
+
+  function cancelPython(questionId) {
+    runControllersRef.current[questionId]?.abort();
+  }
+
   async function runSQL(questionId) {
     const query = answers[questionId] || "";
+    const dataset = questionList.find((q) => q.id === questionId)?.dataset || null;
     setExecution((prev) => ({ ...prev, [questionId]: { loading: true, mode: "sql" } }));
     try {
-      const { data } = await api.post("/execute/sql", { query });
+      const { data } = await api.post("/execute/sql", { query, dataset });
       setExecution((prev) => ({
         ...prev,
         [questionId]: { loading: false, mode: "sql", ...data, stderr: "" },
@@ -254,6 +348,7 @@ export default function CandidateTest() {
 
   async function submitTest(isAutoSubmit = false, reason = null) {
     if (isAutoSubmit && submitting) return;
+    clearTimeout(autosaveTimerRef.current);
     setSubmitting(true);
     setShowSubmitConfirm(false);
     setError("");
@@ -427,16 +522,42 @@ export default function CandidateTest() {
                     options={{ minimap: { enabled: false }, fontSize: 14 }}
                   />
                 </div>
-                <button
-                  onClick={() => runPython(q.id)}
-                  className="rounded-lg bg-slate-800 px-4 py-2 text-sm text-white hover:bg-slate-900"
-                >
-                  Run Python
-                </button>
-                {execution[q.id] && !execution[q.id].loading && (
+                {execution[q.id]?.loading ? (
+                  execution[q.id].live ? (
+                    <button
+                      onClick={() => cancelPython(q.id)}
+                      className="rounded-lg bg-red-600 px-4 py-2 text-sm text-white hover:bg-red-700"
+                    >
+                      Cancel Run
+                    </button>
+                  ) : (
+                    <button
+                      disabled
+                      className="rounded-lg bg-slate-500 px-4 py-2 text-sm text-white"
+                    >
+                      Running...
+                    </button>
+                  )
+                ) : (
+                  <div className="flex flex-wrap gap-2">
+                    <button
+                      onClick={() => runPython(q.id)}
+                      className="rounded-lg bg-slate-800 px-4 py-2 text-sm text-white hover:bg-slate-900"
+                    >
+                      Run Python
+                    </button>
+                    <button
+                      onClick={() => runPythonLive(q.id)}
+                      className="rounded-lg border border-slate-300 px-4 py-2 text-sm text-slate-700 hover:bg-slate-100"
+                    >
+                      Run with live output
+                    </button>
+                  </div>
+                )}
+                {execution[q.id] && (
                   <div className="rounded-xl bg-slate-900 p-3 text-xs text-slate-100">
                     <p className="font-semibold">Output</p>
-                    <pre className="mt-1 whitespace-pre-wrap">{execution[q.id].stdout || "(no stdout)"}</pre>
+                    <pre className="mt-1 whitespace-pre-wrap">{execution[q.id].stdout || (execution[q.id].loading ? "Running..." : "(no stdout)")}</pre>
                     {execution[q.id].stderr && (
                       <>
                         <p className="mt-2 font-semibold text-red-300">Errors</p>
@@ -448,41 +569,57 @@ export default function CandidateTest() {
               </div>
             ) : (
               <div className="mt-3 space-y-3">
-                <div className="rounded-xl border border-slate-200 bg-slate-50 p-3">
-                  <p className="text-xs font-semibold text-slate-700">Dataset: employees</p>
-                  <p className="mt-1 text-xs text-slate-600">
-                    Columns: {sqlColumns.join(", ")}
-                  </p>
-                  <div className="mt-2 overflow-auto">
-                    <table className="min-w-full text-left text-xs text-slate-700">
-                      <thead>
-                        <tr>
-                          {sqlColumns.map((col) => (
-                            <th key={`${q.id}-${col}`} className="border-b border-slate-300 px-2 py-1">
-                              {col}
-                            </th>
-                          ))}
-                        </tr>
-                      </thead>
-                      <tbody>
-                        {EMPLOYEE_ROWS.map((row, idx) => (
-                          <tr key={`${q.id}-sample-${idx}`}>
-                            {row
-                              .slice(0, sqlColumns.length)
-                              .map((cell, cIdx) => (
-                                <td
-                                  key={`${q.id}-sample-${idx}-${cIdx}`}
-                                  className="border-b border-slate-200 px-2 py-1"
-                                >
-                                  {String(cell)}
-                                </td>
-                              ))}
+                {DATASET_TABLES[q.dataset] ? (
+                  <div className="rounded-xl border border-slate-200 bg-slate-50 p-3">
+                    <p className="text-xs font-semibold text-slate-700">Dataset: {q.dataset}</p>
+                    <p className="mt-1 text-xs text-slate-600">
+                      A larger dataset; run a query to explore its rows.
+                    </p>
+                    <ul className="mt-2 space-y-1 text-xs text-slate-700">
+                      {DATASET_TABLES[q.dataset].map(([table, columns]) => (
+                        <li key={`${q.id}-${table}`}>
+                          <span className="font-semibold">{table}</span>({columns.join(", ")})
+                        </li>
+                      ))}
+                    </ul>
+                  </div>
+                ) : (
+                  <div className="rounded-xl border border-slate-200 bg-slate-50 p-3">
+                    <p className="text-xs font-semibold text-slate-700">Dataset: employees</p>
+                    <p className="mt-1 text-xs text-slate-600">
+                      Columns: {sqlColumns.join(", ")}
+                    </p>
+                    <div className="mt-2 overflow-auto">
+                      <table className="min-w-full text-left text-xs text-slate-700">
+                        <thead>
+                          <tr>
+                            {sqlColumns.map((col) => (
+                              <th key={`${q.id}-${col}`} className="border-b border-slate-300 px-2 py-1">
+                                {col}
+                              </th>
+                            ))}
                           </tr>
-                        ))}
-                      </tbody>
-                    </table>
+                        </thead>
+                        <tbody>
+                          {EMPLOYEE_ROWS.map((row, idx) => (
+                            <tr key={`${q.id}-sample-${idx}`}>
+                              {row
+                                .slice(0, sqlColumns.length)
+                                .map((cell, cIdx) => (
+                                  <td
+                                    key={`${q.id}-sample-${idx}-${cIdx}`}
+                                    className="border-b border-slate-200 px-2 py-1"
+                                  >
+                                    {String(cell)}
+                                  </td>
+                                ))}
+                            </tr>
+                          ))}
+                        </tbody>
+                      </table>
+                    </div>
                   </div>
-                </div>
+                )}
                 <textarea
                   rows={7}
                   value={answers[q.id]}
@@ -505,7 +642,10 @@ export default function CandidateTest() {
                       </>
                     ) : (
                       <>
-                        <p className="font-semibold">Rows: {execution[q.id].row_count}</p>
+                        <p className="font-semibold">
+                          Rows: {execution[q.id].row_count}
+                          {execution[q.id].truncated ? " (showing first rows only)" : ""}
+                        </p>
                         {execution[q.id].columns?.length > 0 ? (
                           <div className="mt-2 overflow-auto">
                             <table className="min-w-full text-left text-xs">